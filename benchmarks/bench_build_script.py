@@ -0,0 +1,36 @@
+"""Time script serialization (SessionStore.build_script) on generated scripts,
+time per node should stay roughly flat as the script grows.
+
+    python -m benchmarks.bench_build_script
+"""
+import time
+
+import nukery
+from nukery.parser import NukeScriptParser
+from nukery.store import SessionStore, NodeStore
+from benchmarks.generate import generate_script
+
+
+def time_build_script(script, repeat=3):
+    nukery.script_clear()
+    for node in NukeScriptParser.from_text(script):
+        NodeStore(**node)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        SessionStore.build_script("root")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    nukery.script_clear()
+    return best
+
+
+def main(sizes=(1000, 10000, 30000, 100000)):
+    print("{0:>8} {1:>10} {2:>12}".format("nodes", "build(s)", "us/node"))
+    for size in sizes:
+        build_time = time_build_script(generate_script(size))
+        print("{0:>8} {1:>10.3f} {2:>12.2f}".format(size, build_time, build_time / size * 1e6))
+
+
+if __name__ == "__main__":
+    main()
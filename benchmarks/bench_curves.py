@@ -0,0 +1,71 @@
+"""Compare nukery.curves with setting each curve knob through Node.__setitem__ on Tracker heavy scripts.
+
+    python -m benchmarks.bench_curves
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import nukery
+from nukery import curves
+from benchmarks.generate import generate_script
+
+_frame_pattern = re.compile(r"(?<=\s)x(-?\d+(?:\.\d+)?)(?=[\s}])")
+
+
+def string_offset(nodes, frames):
+    """ Offset curves by editing the knob value of each node as text."""
+    for node in nodes:
+        for name, value in list(node.knobs().items()):
+            if "{curve" in value:
+                node[name] = _frame_pattern.sub(lambda m: "x{0:.10g}".format(float(m.group(1)) + frames), value)
+
+
+def curve_offset(nodes, frames):
+    """ Offset curves through Knob.curves, a NumPy array for each curve."""
+    for node in nodes:
+        for name, value in list(node.knobs().items()):
+            if "{curve" in value:
+                for curve in node.knob(name).curves():
+                    curve.times += frames
+
+
+def time_offset(file_path, func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        nukery.script_clear()
+        nukery.script_open(file_path)
+        nodes = nukery.all_nodes(recursive=True)
+        start = time.perf_counter()
+        func(nodes, 10)
+        # curves edited through Knob.curves are written back when the script is rendered.
+        nukery.get_script_text()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    nukery.script_clear()
+    return best
+
+
+def main(sizes=(500, 2000, 5000)):
+    temp_dir = tempfile.mkdtemp()
+    print("{0:>8} {1:>10} {2:>12} {3:>12} {4:>12} {5:>9}".format(
+        "nodes", "curves", "string(s)", "curve(s)", "batch(s)", "speedup"))
+    try:
+        for size in sizes:
+            file_path = os.path.join(temp_dir, "{0}.nk".format(size))
+            script = generate_script(size, heavy_every=20, heavy_lines=500)
+            with open(file_path, "w") as f:
+                f.write(script)
+            string_time = time_offset(file_path, string_offset)
+            curve_time = time_offset(file_path, curve_offset)
+            batch_time = time_offset(file_path, curves.offset)
+            print("{0:>8} {1:>10} {2:>12.4f} {3:>12.4f} {4:>12.4f} {5:>8.1f}x".format(
+                size, script.count("{curve"), string_time, curve_time, batch_time, string_time / batch_time))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Measure memory used by the session per node and allocations of repeated all_nodes calls.
+
+    python -m benchmarks.bench_memory
+"""
+import gc
+import time
+import tracemalloc
+
+import nukery
+from nukery.parser import NukeScriptParser
+from nukery.store import NodeStore
+from benchmarks.generate import generate_script
+
+
+def measure(size):
+    script = generate_script(size)
+    nukery.script_clear()
+    gc.collect()
+
+    tracemalloc.start()
+    # parser output is part of the session, knob dicts are kept by the node stores.
+    node_data = list(NukeScriptParser.from_text(script))
+    parsed = tracemalloc.get_traced_memory()[0]
+    for data in node_data:
+        NodeStore(**data)
+    del node_data
+    gc.collect()
+    session = tracemalloc.get_traced_memory()[0]
+
+    nukery.all_nodes()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    nodes = nukery.all_nodes()
+    all_nodes_time = time.perf_counter() - start
+    all_nodes_bytes = tracemalloc.get_traced_memory()[1] - before
+    del nodes
+    tracemalloc.stop()
+
+    nukery.script_clear()
+    gc.collect()
+    return session / size, (session - parsed) / size, all_nodes_bytes / size, all_nodes_time
+
+
+def main(sizes=(1000, 10000, 100000)):
+    print("{0:>8} {1:>12} {2:>14} {3:>16} {4:>14}".format(
+        "nodes", "bytes/node", "store b/node", "all_nodes b/node", "all_nodes(s)"))
+    for size in sizes:
+        total, store, all_nodes_bytes, all_nodes_time = measure(size)
+        print("{0:>8} {1:>12.0f} {2:>14.0f} {3:>16.0f} {4:>14.4f}".format(
+            size, total, store, all_nodes_bytes, all_nodes_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Compare regex and lexer engines of NukeScriptParser on generated scripts.
+
+    python -m benchmarks.bench_parser
+"""
+import time
+
+from nukery.parser import NukeScriptParser
+from benchmarks.generate import generate_script
+
+
+def time_engine(script, engine, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in NukeScriptParser.parse_nuke_script(script, engine=engine):
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(sizes=(1000, 10000, 50000)):
+    print("{0:>8} {1:>6} {2:>8} {3:>10} {4:>10} {5:>8}".format(
+        "nodes", "heavy", "MB", "regex(s)", "lexer(s)", "speedup"))
+    for heavy_every in (0, 100):
+        for size in sizes:
+            script = generate_script(size, heavy_every=heavy_every)
+            regex_time = time_engine(script, NukeScriptParser.REGEX)
+            lexer_time = time_engine(script, NukeScriptParser.LEXER)
+            print("{0:>8} {1:>6} {2:>8.1f} {3:>10.3f} {4:>10.3f} {5:>7.1f}x".format(
+                size, heavy_every, len(script) / 1e6, regex_time, lexer_time, regex_time / lexer_time))
+
+
+if __name__ == "__main__":
+    main()
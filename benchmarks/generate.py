@@ -0,0 +1,230 @@
+"""Synthetic nuke script generator used by the benchmarks."""
+import random
+
+
+def generate_script(node_count, seed=0, heavy_every=0, heavy_lines=500, branching=0.0, set_density=0.0,
+                    group_every=0, group_size=20, group_depth=1, clone_ratio=0.0, roto_every=0, roto_points=50):
+    """ Generate a nuke script text with a chain of nodes, optionally with branches, groups, clones and
+    nodes carrying large multi line knob values. Without shape arguments the script is a plain chain.
+
+    Args:
+        node_count(int): number of nodes to generate in root, groups add group_size nodes each
+        seed(int): random seed, so same arguments gives same script
+        heavy_every(int): every nth node is a Tracker with large track data, 0 to disable
+        heavy_lines(int): number of track lines in each Tracker
+        branching(float): probability of starting a branch from an earlier node, branches are merged back
+        set_density(float): probability of a node being saved to a variable with set
+        group_every(int): every nth node is a Group, 0 to disable
+        group_size(int): number of nodes in each Group
+        group_depth(int): maximum nesting depth of groups
+        clone_ratio(float): probability of a node being a clone or an original of clones
+        roto_every(int): every nth node is a RotoPaint with large curves, 0 to disable
+        roto_points(int): number of points in each RotoPaint curve
+    Returns:
+        str: nuke script text
+    """
+    rand = random.Random(seed)
+    # shape decisions have their own random, so scripts without shape arguments stay the same.
+    shape = random.Random(seed + 1)
+    lines = [
+        "version 13.2 v8",
+        "Root {",
+        " inputs 0",
+        " name /tmp/generated.nk",
+        " first 1001",
+        " last 1100",
+        "}",
+    ]
+    options = {
+        "heavy_every": heavy_every,
+        "heavy_lines": heavy_lines,
+        "branching": branching,
+        "set_density": set_density,
+        "group_every": group_every,
+        "group_size": group_size,
+        "group_depth": group_depth,
+        "clone_ratio": clone_ratio,
+        "roto_every": roto_every,
+        "roto_points": roto_points,
+    }
+    _generate_nodes(lines, node_count, 0, rand, shape, options, [0])
+    return "\n".join(lines) + "\n"
+
+
+def _variable(shape, prefix):
+    return prefix + "".join(shape.choice("0123456789abcdef") for _ in range(8))
+
+
+def _generate_nodes(lines, node_count, depth, rand, shape, options, counter, stack_depth=0):
+    """ Add node_count nodes of one parent to lines, counter is the running number used for names."""
+    variables = []
+    originals = []
+    for i in range(node_count):
+        counter[0] += 1
+        number = counter[0]
+        # nodes with a single input take the top of the stack.
+        takes_input = stack_depth > 0
+
+        if stack_depth > 1 and options["branching"] and shape.random() < options["branching"]:
+            lines.extend([
+                "Merge2 {",
+                " inputs 2",
+                " name Merge{0}".format(number),
+                " xpos {0}".format(shape.randint(-5000, 5000)),
+                " ypos {0}".format(shape.randint(-5000, 5000)),
+                "}",
+            ])
+            stack_depth -= 1
+        elif variables and options["branching"] and shape.random() < options["branching"]:
+            lines.append("push ${0}".format(shape.choice(variables)))
+            stack_depth += 1
+            lines.extend([
+                "Blur {",
+                " size {0:.2f}".format(shape.random() * 10),
+                " name Blur{0}".format(number),
+                " xpos {0}".format(shape.randint(-5000, 5000)),
+                " ypos {0}".format(shape.randint(-5000, 5000)),
+                "}",
+            ])
+        elif options["group_every"] and depth < options["group_depth"] and \
+                i % options["group_every"] == options["group_every"] - 1:
+            lines.append("Group {")
+            if not takes_input:
+                lines.append(" inputs 0")
+            lines.extend([
+                " name Group{0}".format(number),
+                " xpos {0}".format(shape.randint(-5000, 5000)),
+                " ypos {0}".format(shape.randint(-5000, 5000)),
+                "}",
+            ])
+            if not takes_input:
+                stack_depth += 1
+            lines.extend([
+                "Input {",
+                " inputs 0",
+                " name Input1",
+                "}",
+            ])
+            _generate_nodes(lines, options["group_size"], depth + 1, rand, shape, options, counter, 1)
+            lines.extend([
+                "Output {",
+                " name Output1",
+                "}",
+                "end_group",
+            ])
+        elif options["clone_ratio"] and takes_input and shape.random() < options["clone_ratio"]:
+            if originals and shape.random() < 0.5:
+                # clones start a new branch, a clone downstream of its original would be a cycle.
+                lines.extend([
+                    "clone ${0} {{".format(shape.choice(originals)),
+                    " inputs 0",
+                    " xpos {0}".format(shape.randint(-5000, 5000)),
+                    " ypos {0}".format(shape.randint(-5000, 5000)),
+                    "}",
+                ])
+                stack_depth += 1
+            else:
+                variable = _variable(shape, "C")
+                lines.extend([
+                    "Grade {",
+                    " white {0:.4f}".format(shape.random()),
+                    " name CloneGrade{0}".format(number),
+                    " xpos {0}".format(shape.randint(-5000, 5000)),
+                    " ypos {0}".format(shape.randint(-5000, 5000)),
+                    "}",
+                    "set {0} [stack 0]".format(variable),
+                ])
+                originals.append(variable)
+        elif options["roto_every"] and i % options["roto_every"] == options["roto_every"] - 1:
+            lines.extend(_roto_lines(number, options["roto_points"], shape, takes_input))
+            if not takes_input:
+                stack_depth += 1
+        elif options["heavy_every"] and i % options["heavy_every"] == options["heavy_every"] - 1:
+            lines.append("Tracker4 {")
+            lines.append(" tracks {{ {{ 1 31 {0} }}".format(options["heavy_lines"]))
+            for j in range(options["heavy_lines"]):
+                lines.append(" {{ {{curve x1001 {0:.3f} x1002 {1:.3f}}} \"track {2}\" 1 }}".format(
+                    rand.random(), rand.random(), j))
+            lines.extend([
+                "}",
+                " name Tracker{0}".format(i + 1),
+                " xpos {0}".format(rand.randint(-5000, 5000)),
+                " ypos {0}".format(rand.randint(-5000, 5000)),
+                "}",
+            ])
+        elif i % 50 == 0:
+            lines.extend([
+                "Read {",
+                " inputs 0",
+                " file /path/to/plate_{0}.####.exr".format(i),
+                " format \"1920 1080 0 0 1920 1080 1 HD_1080\"",
+                " first 1001",
+                " last 1100",
+                " name Read{0}".format(number if depth else i + 1),
+                " xpos {0}".format(rand.randint(-5000, 5000)),
+                " ypos {0}".format(rand.randint(-5000, 5000)),
+                "}",
+            ])
+            stack_depth += 1
+        elif i % 10 == 0:
+            lines.extend([
+                "Transform {",
+                " translate {{{{curve x1001 0 x1050 {0:.4f} x1100 0}} {{curve x1001 0 x1100 {1:.4f}}}}}".format(
+                    rand.random(), rand.random()),
+                " center {960 540}",
+                " name Transform{0}".format(number if depth else i + 1),
+                " xpos {0}".format(rand.randint(-5000, 5000)),
+                " ypos {0}".format(rand.randint(-5000, 5000)),
+                "}",
+            ])
+        else:
+            lines.extend([
+                "Grade {",
+                " white {0:.4f}".format(rand.random()),
+                " gamma {{{0:.4f} {1:.4f} {2:.4f} 1}}".format(rand.random(), rand.random(), rand.random()),
+                " name Grade{0}".format(number if depth else i + 1),
+                " xpos {0}".format(rand.randint(-5000, 5000)),
+                " ypos {0}".format(rand.randint(-5000, 5000)),
+                "}",
+            ])
+
+        if options["set_density"] and stack_depth and shape.random() < options["set_density"]:
+            variable = _variable(shape, "N")
+            lines.append("set {0} [stack 0]".format(variable))
+            variables.append(variable)
+
+
+def _roto_lines(number, points, shape, takes_input):
+    """ RotoPaint node with a bezier shape of the given number of points, nested like nuke writes it."""
+    lines = ["RotoPaint {"]
+    if not takes_input:
+        lines.append(" inputs 0")
+    lines.extend([
+        " curves {{{v x3f99999a}",
+        "  {f 0}",
+        "  {n",
+        "   {layer Root",
+        "    {f 2097152}",
+        "    {t x43a00000 x43700000}",
+        "    {curvegroup Bezier1 512 bezier",
+        "     {{cc",
+        "       {f 8192}",
+        "       {px x41980000",
+    ])
+    for _ in range(points):
+        lines.extend([
+            "        {{x{0:08x} x{1:08x}}}".format(shape.getrandbits(32), shape.getrandbits(32)),
+            "        {{{{x{0:08x} x{1:08x}}}".format(shape.getrandbits(32), shape.getrandbits(32)),
+            "      {{x{0:08x} x{1:08x}}}}}".format(shape.getrandbits(32), shape.getrandbits(32)),
+        ])
+    lines.extend([
+        "       }}     idem}",
+        "     {tx 1 x43500000 x43835555}",
+        "     {a osw x41200000 osf 0 str 1 sb 1 tt x40800000}}}}}}",
+        " toolbar_brush_hardness 0.200000003",
+        " name RotoPaint{0}".format(number),
+        " xpos {0}".format(shape.randint(-5000, 5000)),
+        " ypos {0}".format(shape.randint(-5000, 5000)),
+        "}",
+    ])
+    return lines
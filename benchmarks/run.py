@@ -0,0 +1,297 @@
+"""Benchmark suite, times the main nukery operations on generated scripts of growing size,
+prints the scaling of each operation and saves results as JSON to compare between versions.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000 10000 50000 --shape complex --output results.json
+    python -m benchmarks.run --output new.json --compare old.json
+
+Scaling is the slope of log(time) over log(nodes), 1.0 is linear and 2.0 is quadratic.
+Peak RSS is measured in a new python process for each script_open option, use --no-memory to skip it.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import nukery
+from nukery.parser import NukeScriptParser
+from benchmarks.generate import generate_script
+
+# keyword arguments of generate_script for each shape.
+SHAPES = {
+    "chain": {},
+    "complex": {
+        "heavy_every": 200,
+        "heavy_lines": 100,
+        "branching": 0.1,
+        "set_density": 0.1,
+        "group_every": 100,
+        "group_size": 20,
+        "group_depth": 2,
+        "clone_ratio": 0.05,
+        "roto_every": 200,
+        "roto_points": 50,
+    },
+}
+
+# number of calls timed for operations done per node.
+LOOKUPS = 1000
+CREATES = 200
+DELETES = 200
+
+# script_open keyword arguments of each peak RSS measurement.
+MEMORY_OPTIONS = {
+    "script_open": {},
+    "lazy_knobs": {"lazy_knobs": True},
+    "drop_content": {"drop_content": True},
+    "lazy_groups": {"lazy_groups": True},
+}
+
+_RSS_SCRIPT = """
+import sys
+import nukery
+
+
+def peak_rss():
+    # peak of ru_maxrss is kept over exec on linux, so it would be the peak of the benchmark process.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except IOError:
+        pass
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS.
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+nukery.script_open(sys.argv[1], **%r)
+print(peak_rss())
+"""
+
+
+def _best(func, setup=None, teardown=None, repeat=3):
+    """ Best time of func over repeat runs, setup and teardown are not timed."""
+    best = None
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument)
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _open(file_path):
+    nukery.script_clear()
+    nukery.script_open(file_path)
+
+
+def _create_nodes(_):
+    for i in range(CREATES):
+        nukery.create_node("Grade" if i % 2 else "Transform")
+
+
+def _delete_nodes(nodes):
+    for node in nodes:
+        nukery.delete(node)
+
+
+def time_operations(file_path, script, repeat=3):
+    """ Time each operation on the script, script is opened again before operations that change it.
+
+    Args:
+        file_path(str): path of the script file
+        script(str): script text
+        repeat(int): number of runs, best time is used
+    Returns:
+        dict: operation name and time in seconds
+    """
+    temp_dir = tempfile.mkdtemp()
+    save_path = os.path.join(temp_dir, "saved.nk")
+    results = {}
+    try:
+        for name, engine in (("parse_regex", NukeScriptParser.REGEX), ("parse_lexer", NukeScriptParser.LEXER)):
+            results[name] = _best(
+                lambda _: [None for _ in NukeScriptParser.parse_nuke_script(script, engine=engine)],
+                repeat=repeat)
+
+        results["script_open"] = _best(
+            lambda _: nukery.script_open(file_path), setup=nukery.script_clear, teardown=nukery.script_clear,
+            repeat=repeat)
+        results["open_lazy_groups"] = _best(
+            lambda _: nukery.script_open(file_path, lazy_groups=True), setup=nukery.script_clear,
+            teardown=nukery.script_clear, repeat=repeat)
+
+        _open(file_path)
+        results["all_nodes"] = _best(lambda _: nukery.all_nodes(), repeat=repeat)
+        results["all_nodes_recursive"] = _best(lambda _: nukery.all_nodes(recursive=True), repeat=repeat)
+        results["all_nodes_filter"] = _best(lambda _: nukery.all_nodes("Grade", recursive=True), repeat=repeat)
+
+        names = [node.name for node in nukery.all_nodes()]
+        names = [random.Random(0).choice(names) for _ in range(LOOKUPS)]
+        results["to_node"] = _best(lambda _: [nukery.to_node(name) for name in names], repeat=repeat)
+
+        results["save_script_as"] = _best(lambda _: nukery.save_script_as(save_path), repeat=repeat)
+
+        def setup_delete():
+            _open(file_path)
+            nodes = nukery.all_nodes()
+            return random.Random(0).sample(nodes, min(DELETES, len(nodes)))
+
+        results["create_node"] = _best(_create_nodes, setup=lambda: _open(file_path), repeat=repeat)
+        results["delete"] = _best(_delete_nodes, setup=setup_delete, repeat=repeat)
+    finally:
+        nukery.script_clear()
+        shutil.rmtree(temp_dir)
+    return results
+
+
+def peak_rss(file_path, options):
+    """ Peak resident memory of a new python process opening the file.
+
+    Args:
+        file_path(str): path of the script file
+        options(dict): keyword arguments of script_open
+    Returns:
+        int: bytes, None if resource module is not available (Windows)
+    """
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        return None
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    python_path = os.pathsep.join(p for p in (root, os.environ.get("PYTHONPATH")) if p)
+    output = subprocess.check_output([sys.executable, "-c", _RSS_SCRIPT % (options,), file_path],
+                                     env=dict(os.environ, PYTHONPATH=python_path))
+    return int(output)
+
+
+def scaling(sizes, times):
+    """ Least squares slope of log(time) over log(size), None if it can not be computed."""
+    points = [(math.log(s), math.log(t)) for s, t in zip(sizes, times) if t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def run(sizes, shape="chain", repeat=3, seed=0, memory=True):
+    """ Run the benchmarks for each size.
+
+    Args:
+        sizes(list): number of nodes of each generated script
+        shape(str): key of SHAPES
+        repeat(int): number of runs of each operation, best time is used
+        seed(int): seed of the generator
+        memory(bool): if True peak RSS of opening the script is measured for each of MEMORY_OPTIONS
+    Returns:
+        dict: results, {"sizes": [...], "operations": {name: {"times": [...], "scaling": float}},
+              "memory": {name: [bytes, ...]}}
+    """
+    temp_dir = tempfile.mkdtemp()
+    file_path = os.path.join(temp_dir, "generated.nk")
+    operations = {}
+    memory_results = {}
+    script_sizes = []
+    try:
+        for size in sizes:
+            script = generate_script(size, seed=seed, **SHAPES[shape])
+            with open(file_path, "w") as f:
+                f.write(script)
+            script_sizes.append(len(script))
+            for name, elapsed in time_operations(file_path, script, repeat=repeat).items():
+                operations.setdefault(name, {"times": []})["times"].append(elapsed)
+            if memory:
+                for name, options in MEMORY_OPTIONS.items():
+                    memory_results.setdefault(name, []).append(peak_rss(file_path, options))
+    finally:
+        shutil.rmtree(temp_dir)
+
+    for operation in operations.values():
+        operation["scaling"] = scaling(sizes, operation["times"])
+
+    return {
+        "version": nukery.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(),
+        "shape": shape,
+        "seed": seed,
+        "sizes": list(sizes),
+        "bytes": script_sizes,
+        "operations": operations,
+        "memory": memory_results,
+    }
+
+
+def report(results, compare=None):
+    """ Print results as a table, with the change against compare results of same sizes and shape."""
+    sizes = results["sizes"]
+    header = "{0:<20}".format("operation") + "".join("{0:>12}".format(s) for s in sizes) + "{0:>9}".format("scaling")
+    if compare:
+        header += "{0:>10}".format("change")
+    print(header)
+    for name, operation in results["operations"].items():
+        line = "{0:<20}".format(name) + "".join("{0:>12.4f}".format(t) for t in operation["times"])
+        line += "{0:>9}".format("-" if operation["scaling"] is None else "{0:.2f}".format(operation["scaling"]))
+        old = (compare or {}).get("operations", {}).get(name)
+        if old and (compare.get("sizes"), compare.get("shape")) == (sizes, results["shape"]):
+            # change of the total time over all sizes.
+            line += "{0:>+9.0f}%".format((sum(operation["times"]) / sum(old["times"]) - 1) * 100)
+        print(line)
+
+    memory = dict((k, v) for k, v in results.get("memory", {}).items() if None not in v)
+    if not memory:
+        return
+    print("")
+    print("{0:<20}".format("peak rss (MB)") + "".join("{0:>12}".format(s) for s in sizes))
+    for name, values in memory.items():
+        line = "{0:<20}".format(name) + "".join("{0:>12.1f}".format(v / float(1 << 20)) for v in values)
+        old = (compare or {}).get("memory", {}).get(name)
+        if old and None not in old and (compare.get("sizes"), compare.get("shape")) == (sizes, results["shape"]):
+            line += "{0:>+9.0f}%".format((float(sum(values)) / sum(old) - 1) * 100)
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="chain")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to save results")
+    parser.add_argument("--compare", help="JSON file of earlier results to compare with")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip peak RSS measurement")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, shape=args.shape, repeat=args.repeat, seed=args.seed, memory=args.memory)
+    compare = None
+    if args.compare:
+        with open(args.compare) as f:
+            compare = json.load(f)
+    report(results, compare)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
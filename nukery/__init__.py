@@ -15,8 +15,18 @@ from nukery._nuke import (
     get_script_text,
     root,
     select_all,
+    batch_edit,
+    set_knobs,
+    bulk_connect,
+    topological_sort,
+    connected_writes,
+    fingerprint,
     SessionStore,
 )
+from nukery.cache import ParseCache
+from nukery.compare import diff
+from nukery import instrumentation
+from nukery import curves
 
 __author__ = "@rasheedgm"
 __version__ = "v0.1"
@@ -39,4 +49,12 @@ __all__ = [
     'get_script_text',
     'root',
     'select_all',
+    'batch_edit',
+    'set_knobs',
+    'bulk_connect',
+    'topological_sort',
+    'connected_writes',
+    'fingerprint',
+    'ParseCache',
+    'diff',
 ]
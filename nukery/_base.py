@@ -1,11 +1,21 @@
 from nukery.constants import CLONE_KNOBS
-from nukery.store import NodeStore, SessionStore
+from nukery.knobs import Knob
+from nukery.store import NodeStore, SessionStore, BatchEdit
 
 
 class Node(object):
+    __slots__ = ("node_store",)
+
+    def __new__(cls, class_=None, knobs=None, user_knobs=None, node_store=None):
+        # there is only one node per node store, so same node is returned on every query.
+        if node_store is not None and node_store._node is not None:
+            return node_store._node
+        return super(Node, cls).__new__(cls)
 
     def __init__(self, class_=None, knobs=None, user_knobs=None, node_store=None):
         if node_store:
+            if node_store._node is self:
+                return
             self.node_store = node_store
         else:
             node_data = {
@@ -16,6 +26,7 @@ class Node(object):
                 "inputs": "",
             }
             self.node_store = NodeStore(**node_data)
+        self.node_store._node = self
 
     @property
     def name(self):
@@ -27,17 +38,31 @@ class Node(object):
 
     @property
     def selected(self):
-        return self.node_store.knobs.get("selected", "false") == "true"
+        return self.node_store.get_knob("selected", "false") == "true"
 
     @property
     def parent(self):
         return self.node_store.parent
 
     def knobs(self):
+        self.node_store.sync_typed_knobs()
         return self.node_store.knobs
 
     def knob(self, name):
-        return self[name]
+        """ Get knob value as Knob, it is the str value with typed access to curves of the knob.
+
+        Args:
+            name(str): knob name
+        Returns:
+            Knob: knob value, None if the knob does not exist
+        """
+        value = self[name]
+        if value is None:
+            return None
+        node_store = self.node_store
+        if node_store.type == "clone" and name not in node_store.knobs:
+            node_store = SessionStore.get_variable(node_store.variable)
+        return Knob(value, node_store, name)
 
     def get_class(self):
         return self.node_store.node_class
@@ -56,6 +81,36 @@ class Node(object):
     def set_input(self, index, node):
         self.node_store.set_input(index, node.node_store)
 
+    def upstream(self):
+        """ Get all nodes this node depends on, nodes in groups are followed through Output nodes
+        and Input nodes are followed to the inputs of their group. Result is cached until the graph changes.
+
+        Returns:
+            list: list of Nodes, nearest first
+        """
+        return [Node(node_store=node_store) for node_store in self.node_store.upstream()]
+
+    def downstream(self):
+        """ Get all nodes depending on this node, nodes in groups are followed through Input nodes
+        and Output nodes are followed to their group. Result is cached until the graph changes.
+
+        Returns:
+            list: list of Nodes, nearest first
+        """
+        return [Node(node_store=node_store) for node_store in self.node_store.downstream()]
+
+    def fingerprint(self):
+        """ Get hash of class, knobs, user knobs, input fingerprints and for groups the nodes in it.
+        Name, position and selection are left out, so copies of a node or a gizmo group are equal.
+        Result is cached until the node or anything upstream of it changes.
+
+        Returns:
+            str: hex digest
+        """
+        # curves edited through Knob.curves change knobs of this node or its dependencies.
+        SessionStore.sync_typed_knobs()
+        return self.node_store.fingerprint()
+
     def set_name(self, name):
         self["name"] = name
 
@@ -72,14 +127,25 @@ class Node(object):
     def set_selected(self, value=True):
         if not isinstance(value, bool):
             raise ValueError("value has to be bool")
+        batch = BatchEdit.get_current()
+        if batch is not None:
+            batch.set_selected(self.node_store, value)
+            return
         if value:
             self.node_store.knobs["selected"] = "true"
         else:
             self.node_store.knobs.pop("selected", None)
+        SessionStore.set_selected(self.node_store, value)
 
     def __setitem__(self, key, value):
+        batch = BatchEdit.get_current()
+        if batch is not None:
+            # name is validated and indexes are updated when the batch edit ends.
+            batch.set_knob(self.node_store, key, value)
+            return
+
         if key == "name":
-            ns = self.node_store.get_by_name(value)
+            ns = SessionStore.get_name(self.node_store.parent, value)
             if ns == self.node_store:
                 return
             if ns:
@@ -88,20 +154,33 @@ class Node(object):
         if self.node_store.type == "clone":
             if key not in CLONE_KNOBS:
                 original = SessionStore.get_variable(self.node_store.variable)
-                original.knobs[key] = value
+                if key == "name":
+                    SessionStore.rename(original, value)
+                else:
+                    original.knobs[key] = value
                 return True
 
+        if key == "name":
+            SessionStore.rename(self.node_store, value)
+            return
+
         self.node_store.knobs[key] = value
+        if key == "selected":
+            SessionStore.set_selected(self.node_store, value in (True, "true"))
+        elif key == "number":
+            # Input number connects the Input node to an input of its group.
+            SessionStore.graph_changed()
 
     def __getitem__(self, item):
         if self.node_store.type == "clone":
             if item not in self.node_store.knobs:
                 original = SessionStore.get_variable(self.node_store.variable)
-                return original.knobs.get(item)
-        return self.node_store.knobs.get(item)
+                return original.get_knob(item)
+        return self.node_store.get_knob(item)
 
     def __enter__(self):  # TODO test this
         if self.node_store.is_group:
+            self.node_store.load_group()
             NodeStore.set_current_parent("{0}.{1}".format(self.parent, self.name))
             return self
         else:
@@ -1,23 +1,47 @@
+import gzip
+import os
 import platform
 import subprocess
 
+from nukery.constants import WRITE_BUFFER_SIZE
 from nukery.parser import NukeScriptParser
-from nukery.store import SessionStore, NodeStore
+from nukery.store import SessionStore, NodeStore, BatchEdit, BulkConnect
 from nukery._base import Node
 
 
-def script_open(file_path):
+def script_open(file_path, engine=None, stream=False, lazy_knobs=False, cache=None, drop_content=False,
+                lazy_groups=False):
     """ Open file in to the session.
 
     Args:
         file_path(str): nuke file path.
+        engine(str): parser engine, NukeScriptParser.REGEX or NukeScriptParser.LEXER
+        stream(bool): if True file is read in chunks and nodes are created while reading,
+                      instead of reading and parsing whole file first, this always uses lexer engine.
+        lazy_knobs(bool): if True knobs of each node are parsed only when those are accessed,
+                          nodes that are never accessed are saved as they are read.
+        cache(ParseCache): if given parser output is read from the cache, file is parsed and
+                           stored in the cache only if it is not cached yet, stream is ignored.
+        drop_content(bool): if True node text is not kept once knobs of the node are parsed, this
+                            saves memory, NodeStore.node_content is None for those nodes.
+        lazy_groups(bool): if True nodes in groups are created only when the group is used, by all_nodes of
+                           the group or recursive, with node context, to_node of a node in it or graph queries
+                           through it. Groups that are never used are saved as they are read.
 
     """
     if SessionStore.has_value():
         raise Exception("Script already open")
 
-    for node_data in NukeScriptParser.from_file(file_path):
-        NodeStore(**node_data)
+    if cache is not None:
+        script_nodes = cache.load(file_path, engine=engine, lazy_knobs=lazy_knobs, lazy_groups=lazy_groups)
+    elif stream:
+        script_nodes = NukeScriptParser.iter_file(file_path, lazy_knobs=lazy_knobs, lazy_groups=lazy_groups)
+    else:
+        script_nodes = NukeScriptParser.from_file(file_path, engine=engine, lazy_knobs=lazy_knobs,
+                                                  lazy_groups=lazy_groups)
+
+    for node_data in script_nodes:
+        NodeStore(drop_content=drop_content, **node_data)
 
 
 def script_clear():
@@ -40,6 +64,20 @@ def all_nodes(filter_=None, group=None, recursive=False):
     if group and not group.startswith("root"):
         group = "root." + group
     parent = group if group else NodeStore.get_current_parent()
+    SessionStore.load_groups(parent, recursive)
+    if filter_:
+        if filter_ == "Root":
+            return nodes
+        parent_keys = [parent]
+        if recursive:
+            # only parents with nodes of the class, in the order of the session.
+            class_parents = [k for k in SessionStore.get_class_parents(filter_) if k.startswith(parent)]
+            if len(class_parents) > 1:
+                order = dict((k, i) for i, k in enumerate(SessionStore.get_current().keys()))
+                class_parents.sort(key=lambda k: order.get(k, len(order)))
+            parent_keys = class_parents
+        return [Node(node_store=node_store) for node_store in SessionStore.get_by_class(filter_, parent_keys)]
+
     parent_keys = [parent]
     if recursive:
         parent_keys = [k for k in SessionStore.get_current().keys() if k.startswith(parent)]
@@ -47,8 +85,6 @@ def all_nodes(filter_=None, group=None, recursive=False):
         for node_store in SessionStore.get_current()[parent_key]:
             if node_store.node_class == "Root":
                 continue
-            if filter_ and node_store.node_class != filter_:
-                continue
             node = Node(node_store=node_store)
             nodes.append(node)
     return nodes
@@ -68,33 +104,25 @@ def select_all():
     for node_store in SessionStore.get_current()[NodeStore.get_current_parent()]:
         if node_store.node_class == "Root":
             continue
-        node = Node(node_store=node_store)
-        if node and node["selected"] not in (True, "true"):
-            node.set_selected(True)
+        if node_store.get_knob("selected") != "true":
+            Node(node_store=node_store).set_selected(True)
 
 
 def selected_nodes():
     """ Get selected nodes from the session and the context.
 
     Returns:
-        list: list of Nodes
+        list: list of Nodes in the order those are selected.
     """
-    selected = []
-    for node_store in SessionStore.get_current()[NodeStore.get_current_parent()]:
-        node = Node(node_store=node_store)
-        if node and node["selected"] in (True, "true"):
-            selected.append(node)
-    return selected
+    return [Node(node_store=node_store) for node_store in SessionStore.get_selected(NodeStore.get_current_parent())]
 
 
 def selected_node():
-    """Select last selected node(this last by store session,
-    does not promise returning node that last selected
+    """ Get last selected node from the session and the context.
     """
-    for node_store in reversed(SessionStore.get_current()[NodeStore.get_current_parent()]):
-        node = Node(node_store=node_store)
-        if node and node["selected"] in (True, "true"):
-            return node
+    node_store = SessionStore.get_last_selected(NodeStore.get_current_parent())
+    if node_store:
+        return Node(node_store=node_store)
 
 
 def clear_selection():
@@ -103,15 +131,130 @@ def clear_selection():
         node.set_selected(False)
 
 
-def save_script_as(file_path):
-    """ Save current session to a file."""
-    script = SessionStore.build_script("root")
-    with open(file_path, "w") as f:
-        f.write(script)
+def save_script_as(file_path, compress=False):
+    """ Save current session to a file, script is written while it is built
+    so the whole script text is never kept in memory.
 
+    Args:
+        file_path(str): file path to save
+        compress(bool): if True file is written gzip compressed
+    """
+    _write_script(file_path, compress)
     return True
 
 
+def _write_script(file_path, compress):
+    """ Write script of the current session to the file.
+
+    Returns:
+        int: size of the written file in bytes
+    """
+    if compress:
+        f = gzip.open(file_path, "wt")
+    else:
+        f = open(file_path, "w", buffering=WRITE_BUFFER_SIZE)
+    with f:
+        fragments = SessionStore.iter_script("root")
+        for fragment in fragments:
+            f.write(fragment)
+            break
+        for fragment in fragments:
+            f.write("\n")
+            f.write(fragment)
+    return os.path.getsize(file_path)
+
+
+def batch_edit():
+    """ Context to change knobs of many nodes as one transaction, knobs are set straight away while
+    name uniqueness validation, name and selection index updates and dropping of cached scripts are done
+    once at the end. If the context raises or names are not unique all changes are rolled back.
+    Names can be swapped in a batch edit, to_node finds nodes by their old names until the end.
+
+        with nukery.batch_edit():
+            for node in nukery.all_nodes("Read"):
+                node["file"] = node["file"].replace("/old/", "/new/")
+
+    Returns:
+        BatchEdit: context manager
+    """
+    return BatchEdit()
+
+
+def set_knobs(nodes, knobs):
+    """ Set knobs of all nodes in one batch edit, see batch_edit.
+
+    Args:
+        nodes(list): list of Nodes
+        knobs(dict): knob names and values
+    """
+    with BatchEdit() as batch:
+        for node in nodes:
+            batch.set_knobs(node.node_store, knobs)
+
+
+def bulk_connect():
+    """ Context to change many connections, set_input does not check for cycles in the context,
+    graph downstream of the changed nodes is checked once at the end in linear time.
+    If there are cycles, inputs of all changed nodes are restored and an exception listing the cycles
+    is raised, cycles are kept in the cycles attribute of the context. Inputs are restored if the context
+    raises as well. Nodes can not be deleted in the context.
+
+        with nukery.bulk_connect():
+            for node in nukery.all_nodes("Grade"):
+                node.set_input(0, read)
+
+    Returns:
+        BulkConnect: context manager
+    """
+    return BulkConnect()
+
+
+def topological_sort(group=None, recursive=False):
+    """ Get nodes ordered so every node comes after the nodes it depends on.
+    Result is cached until connections change.
+
+    Args:
+        group(str): name of the group, root.Group1, current group if None
+        recursive(bool): if True nodes of child groups are included, group nodes come after their
+                         Output nodes and Input nodes come after the inputs of their group.
+    Returns:
+        list: list of Nodes
+    """
+    if group and not group.startswith("root"):
+        group = "root." + group
+    parent = group if group else NodeStore.get_current_parent()
+    return [Node(node_store=node_store) for node_store in NodeStore.topological_sort(parent, recursive)]
+
+
+def connected_writes(node):
+    """ Get write nodes fed by the node, across group boundaries.
+    Result is cached until connections change.
+
+    Args:
+        node(Node): node
+    Returns:
+        list: list of Nodes
+    """
+    return [Node(node_store=node_store) for node_store in node.node_store.connected_writes()]
+
+
+def fingerprint(group=None):
+    """ Get fingerprint of the nodes of the group, see Node.fingerprint. Equal groups have equal fingerprint,
+    order of the nodes is not part of it. Result is cached until a node in the group changes.
+
+    Args:
+        group(str): name of the group, root.Group1, current group if None
+    Returns:
+        str: hex digest
+    """
+    if group and not group.startswith("root"):
+        group = "root." + group
+    parent = group if group else NodeStore.get_current_parent()
+    SessionStore.load_groups(parent)
+    SessionStore.sync_typed_knobs()
+    return NodeStore.body_fingerprint(parent)
+
+
 def delete(node):
     """Delete a node """
     node.node_store.delete()
@@ -123,18 +266,17 @@ def get_script_text(selected=False):
     Args:
         selected(bool): if true then script text for selected node will be returned
     """
+    if not selected:
+        return "\n".join(SessionStore.iter_script(NodeStore.get_current_parent()))
+
     node_stores = []
-    current_nodes = SessionStore.get_current()[NodeStore.get_current_parent()]
-    if selected:
-        for node_store in current_nodes:
-            if node_store.type in ("node", "clone"):
-                if node_store.knobs.get("selected", "false") == "false":
-                    continue
-                node_stores.append(node_store)
-    else:
-        node_stores = current_nodes.copy()
+    for node_store in SessionStore.get_current()[NodeStore.get_current_parent()]:
+        if node_store.type in ("node", "clone"):
+            if node_store.get_knob("selected", "false") == "false":
+                continue
+            node_stores.append(node_store)
 
-    return SessionStore.build_script_from_list(node_stores)
+    return "\n".join(SessionStore.iter_script_from_list(node_stores))
 
 
 def node_copy(file_name=None):
@@ -179,16 +321,7 @@ def node_paste(file_name=None):
                         if this is None then will try to import form clipboard
     """
     if file_name is None:
-        system_os = platform.system()
-        # windows
-        if system_os == 'Windows':
-            cmd = ['powershell', 'Get-Clipboard']
-        elif system_os == 'Darwin':
-            cmd = ['pbpaste']
-        else:
-            cmd = ['xclip', '-selection', 'clipboard', '-out', '-nonewline']
-
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        process = subprocess.Popen(_paste_command(), stdout=subprocess.PIPE)
         result,  error = process.communicate()
         if error:
             raise Exception("Error copying to clipboard")
@@ -199,8 +332,24 @@ def node_paste(file_name=None):
         with open(file_name, "r") as f:
             script = f.read()
 
+    return _paste_nodes(NukeScriptParser.from_text(script))
+
+
+def _paste_command():
+    """ Command to read clipboard of this platform."""
+    system_os = platform.system()
+    # windows
+    if system_os == 'Windows':
+        return ['powershell', 'Get-Clipboard']
+    elif system_os == 'Darwin':
+        return ['pbpaste']
+    return ['xclip', '-selection', 'clipboard', '-out', '-nonewline']
+
+
+def _paste_nodes(script_nodes):
+    """ Create nodes from parsed node details in to the session."""
     nodes = []
-    for node_data in NukeScriptParser.from_text(script):
+    for node_data in script_nodes:
         node_store = NodeStore(**node_data)
         nodes.append(Node(node_store=node_store))
 
@@ -216,7 +365,7 @@ def create_node(node_class, **kwargs):
         knobs can be initialized by passing as key word args
     """
     _selected = selected_node()
-    _selected = selected_node().node_store if _selected else None
+    _selected = _selected.node_store if _selected else None
     clear_selection()  # TODO check if this is time taking
     last_node = _selected
     inputs = ""
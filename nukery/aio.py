@@ -0,0 +1,117 @@
+"""asyncio front-end of nukery.
+
+File reading and parsing runs in an executor (default executor of the loop, or the one set with set_executor,
+it can be a ProcessPoolExecutor), nodes are created in a worker thread in the context of the given session,
+so loading many sessions at the same time does not block the event loop.
+
+    session = nukery.SessionStore("shot010")
+    await nukery.aio.open_script("/file/path.nk", session=session)
+    with session:
+        reads = nukery.all_nodes("Read")
+"""
+import asyncio
+import contextvars
+import subprocess
+
+from nukery._nuke import save_script_as, _paste_command, _paste_nodes
+from nukery.parser import NukeScriptParser
+from nukery.store import SessionStore, NodeStore
+
+_executor = None
+
+
+def set_executor(executor):
+    """ Set executor used for reading and parsing files, None to use default executor of the loop.
+
+    Args:
+        executor(concurrent.futures.Executor): thread or process pool executor
+    """
+    global _executor
+    _executor = executor
+
+
+def get_executor():
+    """ Get executor used for reading and parsing files, None if default executor of the loop is used."""
+    return _executor
+
+
+def _parse_file(file_path, engine=None, lazy_knobs=False, lazy_groups=False):
+    return list(NukeScriptParser.from_file(file_path, engine=engine, lazy_knobs=lazy_knobs, lazy_groups=lazy_groups))
+
+
+def _parse_text(text):
+    return list(NukeScriptParser.from_text(text))
+
+
+def _load_nodes(script_nodes, drop_content=False):
+    if SessionStore.has_value():
+        raise Exception("Script already open")
+    for node_data in script_nodes:
+        NodeStore(drop_content=drop_content, **node_data)
+
+
+async def _run_in_session(session, func, *args):
+    """ Run func in a worker thread with the context of the caller, with session as the current session."""
+    context = contextvars.copy_context()
+
+    def run():
+        if session is not None:
+            SessionStore.set_current(session.session)
+        return func(*args)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, context.run, run)
+
+
+async def open_script(file_path, session=None, engine=None, lazy_knobs=False, executor=None, drop_content=False,
+                      lazy_groups=False):
+    """ Open file in to the session, see nukery.script_open.
+
+    Args:
+        file_path(str): nuke file path.
+        session(SessionStore): session to open the file in, current session if None
+        engine(str): parser engine, NukeScriptParser.REGEX or NukeScriptParser.LEXER
+        lazy_knobs(bool): if True knobs of each node are parsed only when those are accessed
+        executor(concurrent.futures.Executor): executor to parse the file, executor set with set_executor if None
+        drop_content(bool): if True node text is not kept once knobs of the node are parsed
+        lazy_groups(bool): if True nodes in groups are created only when the group is used
+    """
+    loop = asyncio.get_running_loop()
+    script_nodes = await loop.run_in_executor(
+        executor or _executor, _parse_file, file_path, engine, lazy_knobs, lazy_groups)
+    await _run_in_session(session, _load_nodes, script_nodes, drop_content)
+
+
+async def save_script(file_path, session=None, compress=False):
+    """ Save session to a file, see nukery.save_script_as.
+
+    Args:
+        file_path(str): file path to save
+        session(SessionStore): session to save, current session if None
+        compress(bool): if True file is written gzip compressed
+    """
+    return await _run_in_session(session, save_script_as, file_path, compress)
+
+
+async def paste(file_name=None, session=None, executor=None):
+    """ Paste node from file or clipboard, see nukery.node_paste.
+
+    Args:
+        file_name(str): file path to import node from, if this is None then will try to import form clipboard
+        session(SessionStore): session to paste in to, current session if None
+        executor(concurrent.futures.Executor): executor to parse the script, executor set with set_executor if None
+    Returns:
+        list: list of pasted Nodes
+    """
+    loop = asyncio.get_running_loop()
+    executor = executor or _executor
+    if file_name is None:
+        process = await asyncio.create_subprocess_exec(*_paste_command(), stdout=subprocess.PIPE)
+        result, error = await process.communicate()
+        if error:
+            raise Exception("Error copying to clipboard")
+        script_nodes = await loop.run_in_executor(executor, _parse_text, result.decode('utf-8'))
+    else:
+        script_nodes = await loop.run_in_executor(executor, _parse_file, file_name)
+
+    return await _run_in_session(session, _paste_nodes, script_nodes)
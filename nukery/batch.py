@@ -0,0 +1,76 @@
+import os
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+from nukery._nuke import script_open, script_clear
+
+
+# result of one script, error is the formatted traceback if opening the script or func failed.
+ScriptResult = namedtuple("ScriptResult", ["path", "result", "error"])
+
+
+def _run_chunk(paths, func, open_kwargs):
+    """ Open each script in to the session of the worker process and run func on it."""
+    results = []
+    for path in paths:
+        script_clear()
+        try:
+            script_open(path, **open_kwargs)
+            results.append(ScriptResult(path, func(path), None))
+        except Exception:
+            results.append(ScriptResult(path, None, traceback.format_exc()))
+        finally:
+            script_clear()
+    return results
+
+
+def map_scripts(paths, func, workers=None, chunksize=1, **open_kwargs):
+    """ Open scripts in worker processes and run func against each loaded session.
+
+    func is called with the script path while the script is open in the session of the worker,
+    it can use nukery functions like all_nodes, return value has to be picklable.
+    Results are yielded in completion order, errors are captured per script.
+
+        def count_nodes(path):
+            return len(nukery.all_nodes(recursive=True))
+
+        for result in map_scripts(paths, count_nodes, workers=8, chunksize=16):
+            print(result.path, result.result, result.error)
+
+    Args:
+        paths(iterable): nuke script paths, consumed as workers become free
+        func(callable): picklable callable, module level function
+        workers(int): number of worker processes, number of cpus if None
+        chunksize(int): number of scripts sent to a worker at once
+    Keyword Args:
+        passed to script_open, eg: lazy_knobs=True
+    Returns:
+        generator: ScriptResult for each path
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, int(chunksize))
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        while True:
+            # keep few chunks per worker in flight, so paths are not all submitted at once.
+            while len(pending) < workers * 2:
+                chunk = list(islice(paths, chunksize))
+                if not chunk:
+                    break
+                pending[executor.submit(_run_chunk, chunk, func, open_kwargs)] = chunk
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception:
+                    # whole chunk failed, eg: result is not picklable or worker died.
+                    error = traceback.format_exc()
+                    results = [ScriptResult(path, None, error) for path in chunk]
+                for result in results:
+                    yield result
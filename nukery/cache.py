@@ -0,0 +1,193 @@
+import os
+import zlib
+import pickle
+import hashlib
+import tempfile
+
+from nukery.parser import NukeScriptParser
+
+# bump when parser output changes, so old cache entries are not used.
+CACHE_FORMAT_VERSION = 1
+
+
+class ParseCache(object):
+    """ On disk cache of parsed nuke scripts.
+
+    Parser output of a file is stored as zlib compressed pickle in the cache directory, keyed by
+    file path, modification time and size ("stat") or by hash of the file content ("content").
+    Least recently used entries are removed when the directory grows larger than max_size.
+
+        cache = ParseCache("/tmp/nukery_cache")
+        nukery.script_open("/file/path", cache=cache)
+    """
+    STAT = "stat"
+    CONTENT = "content"
+    extension = ".nkc"
+
+    def __init__(self, cache_dir=None, max_size=512 << 20, key=STAT):
+        """
+        Args:
+            cache_dir(str): cache directory, NUKERY_CACHE_DIR environment variable or
+                            ~/.cache/nukery if None
+            max_size(int): maximum size of the cache directory in bytes
+            key(str): ParseCache.STAT or ParseCache.CONTENT
+        """
+        if key not in (self.STAT, self.CONTENT):
+            raise Exception("unknown cache key {0}".format(key))
+        if cache_dir is None:
+            cache_dir = os.environ.get("NUKERY_CACHE_DIR") or \
+                os.path.join(os.path.expanduser("~"), ".cache", "nukery")
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def cache_key(self, file_path, engine=None, lazy_knobs=False, lazy_groups=False):
+        """ Get cache key of the file for given parser options.
+
+        Args:
+            file_path(str): nuke file path
+            engine(str): parser engine
+            lazy_knobs(bool): lazy knobs option of the parser
+            lazy_groups(bool): lazy groups option of the parser
+        Returns:
+            str: cache key
+        """
+        engine = engine or NukeScriptParser.engine
+        if lazy_knobs or lazy_groups:
+            engine = NukeScriptParser.LEXER
+        key = hashlib.sha1("{0}:{1}:{2}:".format(CACHE_FORMAT_VERSION, engine, bool(lazy_knobs)).encode())
+        if lazy_groups:
+            # keys of other options are same as before lazy groups.
+            key.update(b"lazy_groups:")
+        if self.key == self.STAT:
+            stat = os.stat(file_path)
+            key.update("{0}:{1}:{2}".format(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size).encode())
+        else:
+            with open(file_path, "rb") as file_open:
+                for chunk in iter(lambda: file_open.read(1 << 20), b""):
+                    key.update(chunk)
+        return key.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def get(self, file_path, engine=None, lazy_knobs=False, lazy_groups=False):
+        """ Get cached parser output of the file.
+
+        Returns:
+            list(dict): list of node details dict, None if it is not cached.
+        """
+        entry_path = self._entry_path(self.cache_key(file_path, engine, lazy_knobs, lazy_groups))
+        try:
+            with open(entry_path, "rb") as file_open:
+                data = file_open.read()
+            nodes = pickle.loads(zlib.decompress(data))
+        except (IOError, OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        # modification time of the entry is its last use.
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return nodes
+
+    def put(self, file_path, nodes, engine=None, lazy_knobs=False, lazy_groups=False):
+        """ Store parser output of the file.
+
+        Args:
+            file_path(str): nuke file path
+            nodes(list): list of node details dict
+            engine(str): parser engine
+            lazy_knobs(bool): lazy knobs option of the parser
+            lazy_groups(bool): lazy groups option of the parser
+        """
+        entry_path = self._entry_path(self.cache_key(file_path, engine, lazy_knobs, lazy_groups))
+        data = zlib.compress(pickle.dumps(nodes, pickle.HIGHEST_PROTOCOL), 1)
+        # write to temp file and move it, so other processes never read half written entry.
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_open:
+                file_open.write(data)
+            os.replace(temp_path, entry_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def load(self, file_path, engine=None, lazy_knobs=False, lazy_groups=False):
+        """ Get parser output of the file from cache, parse and store it if it is not cached.
+
+        Args:
+            file_path(str): nuke file path
+            engine(str): parser engine
+            lazy_knobs(bool): lazy knobs option of the parser
+            lazy_groups(bool): lazy groups option of the parser
+        Returns:
+            list(dict): list of node details dict.
+        """
+        nodes = self.get(file_path, engine, lazy_knobs, lazy_groups)
+        if nodes is None:
+            nodes = list(NukeScriptParser.from_file(file_path, engine=engine, lazy_knobs=lazy_knobs,
+                                                    lazy_groups=lazy_groups))
+            self.put(file_path, nodes, engine, lazy_knobs, lazy_groups)
+        return nodes
+
+    def _entries(self):
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(self.extension):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+        return entries
+
+    def size(self):
+        """ Total size of cache entries in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """ Remove least recently used entries until cache is not larger than max_size."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_name in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """ Remove all cache entries and reset counters."""
+        for _, _, file_name in self._entries():
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """ Get cache statistics.
+
+        Returns:
+            dict: hits, misses, entries and size in bytes
+        """
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "size": sum(size for _, size, _ in entries),
+        }
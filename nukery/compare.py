@@ -0,0 +1,211 @@
+"""Structural diff of two nuke scripts.
+
+Both scripts are loaded in to their own sessions, nodes are matched by full name and class, nodes that are
+not matched by name are matched by their content to find renamed nodes. Changes are yielded one by one.
+
+    for change in nukery.diff("/file/comp_v001.nk", "/file/comp_v002.nk"):
+        print(change.change, change.name, change.knob, change.old, change.new)
+"""
+import itertools
+from collections import namedtuple, deque
+
+from nukery._nuke import script_open, script_clear
+from nukery.constants import CLONE_KNOBS, FINGERPRINT_IGNORED_KNOBS
+from nukery.store import SessionStore
+
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"
+REWIRED = "rewired"
+KNOB = "knob"
+
+# change is one of ADDED, REMOVED, RENAMED, REWIRED and KNOB, name is the full name of the node,
+# knob is the knob name of KNOB changes, old and new are knob values of KNOB changes,
+# full names of RENAMED changes and input full names of REWIRED changes.
+Change = namedtuple("Change", ["change", "name", "node_class", "knob", "old", "new"])
+
+_session_numbers = itertools.count()
+
+
+def _load(file_path, engine):
+    """ Open file in a new session.
+
+    Returns:
+        tuple: session, records of the nodes, {key: (node_store, node_class, input keys, original)} and
+               keys of clones and their original, {full name: [keys]}
+    """
+    session = SessionStore("__diff_{0}__".format(next(_session_numbers)))
+    with session:
+        script_open(file_path, engine=engine, lazy_knobs=True)
+        keys = {}
+        nodes = []
+        families = {}
+        for parent, node_stores in SessionStore.get_current().items():
+            for node_store in node_stores:
+                node_class = node_store.node_class
+                if node_class == "Root":
+                    key = "Root"
+                else:
+                    key = "{0}.{1}".format(parent, node_store.name)
+                    if node_store.type == "clone" or node_store.variable:
+                        # clones have the name of the original.
+                        family = families.setdefault(key, [])
+                        if family:
+                            key = "{0}@clone{1}".format(key, len(family))
+                        family.append(key)
+                keys[id(node_store)] = key
+                nodes.append((key, node_store, node_class))
+        records = {}
+        for key, node_store, node_class in nodes:
+            inputs = tuple(keys.get(id(i)) if i is not None else None for i in node_store.inputs)
+            # clones have the knobs of the original other than their position.
+            original = SessionStore.get_variable(node_store.variable) if node_store.type == "clone" else node_store
+            records[key] = (node_store, node_class, inputs, original)
+    return session, records, families
+
+
+def _match_clones(families_a, families_b, records_a, records_b):
+    """ Match clones and their original, any of those can be written as the original,
+    so those are matched by position and then by order.
+
+    Returns:
+        dict: {key in b: key in a or None if it is not matched}
+    """
+    matched = {}
+    for family, keys_b in families_b.items():
+        keys_a = families_a.get(family, [])
+        if len(keys_a) < 2 and len(keys_b) < 2:
+            continue
+        positions = {}
+        for key in keys_a:
+            node_store = records_a[key][0]
+            positions.setdefault((node_store.get_knob("xpos"), node_store.get_knob("ypos")), deque()).append(key)
+        unmatched_b = []
+        for key in keys_b:
+            node_store = records_b[key][0]
+            same_position = positions.get((node_store.get_knob("xpos"), node_store.get_knob("ypos")))
+            if same_position:
+                matched[key] = same_position.popleft()
+            else:
+                unmatched_b.append(key)
+        used = set(matched.values())
+        unmatched_a = deque(key for key in keys_a if key not in used)
+        for key in unmatched_b:
+            matched[key] = unmatched_a.popleft() if unmatched_a else None
+    return matched
+
+
+def _content_key(node_store, node_class):
+    """ Key of the node content without name and position, used to match renamed nodes."""
+    knobs = tuple(sorted((k, v) for k, v in node_store.knobs.items() if k not in FINGERPRINT_IGNORED_KNOBS))
+    return node_class, node_store.parent, knobs, tuple(node_store.user_knobs)
+
+
+def _match_renamed(records_a, records_b):
+    """ Match nodes not matched by name and class, by their content.
+
+    Returns:
+        dict: {key in a: key in b}
+    """
+    contents = {}
+    for key, (node_store, node_class, _inputs, _original) in records_a.items():
+        record_b = records_b.get(key)
+        if node_store.type != "node" or (record_b is not None and record_b[1] == node_class):
+            continue
+        contents.setdefault(_content_key(node_store, node_class), deque()).append(key)
+    renamed = {}
+    if not contents:
+        return renamed
+    for key, (node_store, node_class, _inputs, _original) in records_b.items():
+        record_a = records_a.get(key)
+        if node_store.type != "node" or (record_a is not None and record_a[1] == node_class):
+            continue
+        keys_a = contents.get(_content_key(node_store, node_class))
+        if keys_a:
+            renamed[keys_a.popleft()] = key
+    return renamed
+
+
+def _get_knobs(node_store, original):
+    if original is node_store:
+        return node_store.knobs
+    knobs = dict((k, v) for k, v in original.knobs.items() if k not in CLONE_KNOBS)
+    knobs.update((k, v) for k, v in node_store.knobs.items() if k in CLONE_KNOBS)
+    return knobs
+
+
+def _is_same_content(node_store_a, node_store_b):
+    """ Nodes which are not parsed yet are same if their content is same."""
+    return not node_store_a.knobs_parsed and not node_store_b.knobs_parsed and \
+        node_store_a.node_content == node_store_b.node_content
+
+
+def _knob_changes(key, node_class, record_a, record_b, ignore_knobs):
+    node_store_a, _node_class, _inputs, original_a = record_a
+    node_store_b, _node_class, _inputs, original_b = record_b
+    if _is_same_content(node_store_a, node_store_b) and \
+            (original_a is node_store_a) == (original_b is node_store_b) and \
+            (original_a is node_store_a or _is_same_content(original_a, original_b)):
+        return
+    knobs_a = _get_knobs(node_store_a, original_a)
+    knobs_b = _get_knobs(node_store_b, original_b)
+    for knob, value in knobs_b.items():
+        if knob == "name" or knob in ignore_knobs:
+            continue
+        old = knobs_a.get(knob)
+        if old != value:
+            yield Change(KNOB, key, node_class, knob, old, value)
+    for knob, value in knobs_a.items():
+        if knob not in knobs_b and knob != "name" and knob not in ignore_knobs:
+            yield Change(KNOB, key, node_class, knob, value, None)
+    if original_a.user_knobs != original_b.user_knobs:
+        yield Change(KNOB, key, node_class, "addUserKnob", original_a.user_knobs, original_b.user_knobs)
+
+
+def diff(path_a, path_b, engine=None, ignore_knobs=("selected",)):
+    """ Compare two nuke scripts and yield the changes from path_a to path_b.
+
+    Nodes are matched by full name and class, nodes of same class and parent with same knobs and
+    different name are reported as renamed. Changes of matched nodes are yielded in the order of path_b,
+    removed nodes are yielded at the end. Knobs of nodes with same content are not parsed.
+
+    Args:
+        path_a(str): nuke script path, old version
+        path_b(str): nuke script path, new version
+        engine(str): parser engine, NukeScriptParser.REGEX or NukeScriptParser.LEXER
+        ignore_knobs(tuple): knob names not compared
+    Returns:
+        generator: Change for each change
+    """
+    session_a, records_a, families_a = _load(path_a, engine)
+    session_b, records_b, families_b = _load(path_b, engine)
+    try:
+        renamed = _match_renamed(records_a, records_b)
+        # {key in b: key in a} of nodes matched other than by their key.
+        keys_a = dict((key_b, key_a) for key_a, key_b in renamed.items())
+        keys_a.update(_match_clones(families_a, families_b, records_a, records_b))
+        renamed_b = set(renamed.values())
+        matched = set()
+        for key, record_b in records_b.items():
+            node_class, inputs_b = record_b[1], record_b[2]
+            key_a = keys_a.get(key, key)
+            record_a = records_a.get(key_a) if key_a is not None else None
+            if record_a is None or record_a[1] != node_class:
+                yield Change(ADDED, key, node_class, None, None, None)
+                continue
+            matched.add(key_a)
+            inputs_a = record_a[2]
+            if key in renamed_b and key_a != key:
+                yield Change(RENAMED, key, node_class, None, key_a, key)
+            for change in _knob_changes(key, node_class, record_a, record_b, ignore_knobs):
+                yield change
+            if tuple(keys_a.get(i, i) for i in inputs_b) != inputs_a:
+                yield Change(REWIRED, key, node_class, None, inputs_a, inputs_b)
+
+        for key, record_a in records_a.items():
+            if key not in matched:
+                yield Change(REMOVED, key, record_a[1], None, None, None)
+    finally:
+        for session in (session_a, session_b):
+            with session:
+                script_clear()
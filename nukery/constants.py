@@ -184,4 +184,20 @@ NODE_SCRIPT_FORMAT = """{0} {{
  {1}
 }}"""
 
+# node script from unparsed node content, content has its own line breaks.
+NODE_CONTENT_SCRIPT_FORMAT = """{0} {{
+{1}}}"""
+
 CLONE_KNOBS = ("xpos", "ypos", "selected")
+
+# knobs read by the parser even when knobs are lazy, these are needed while building the session.
+EAGER_KNOBS = ("name", "selected")
+
+# buffer size of the file writer used while saving scripts.
+WRITE_BUFFER_SIZE = 1 << 20
+
+# classes of nodes that write files, see nukery.connected_writes
+WRITE_CLASSES = ("Write", "DeepWrite", "WriteGeo")
+
+# knobs left out of node fingerprints, so same nodes in other places or with other names are equal.
+FINGERPRINT_IGNORED_KNOBS = ("name", "xpos", "ypos", "selected")
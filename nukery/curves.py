@@ -0,0 +1,196 @@
+"""Batch operations on animation curves of many nodes.
+
+Frames of all curves in the knobs of the given nodes are read in to one buffer, changed with a single NumPy
+operation and written back in to the knob values, without making an object for each curve.
+
+    nukery.curves.offset(nukery.all_nodes(recursive=True), 24)
+    nukery.curves.scale(nukery.selected_nodes(), 0.5, pivot=1001)
+    nukery.curves.resample(nukery.all_nodes("Tracker4"), 1001, 1100)
+
+NumPy is needed for these, see nukery.knobs.
+"""
+import re
+
+from nukery.knobs import numpy, _format_number
+from nukery.store import SessionStore
+
+_number = r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+# whole curves with braces, curves does not have nested braces.
+_curve_pattern = re.compile(r"(\{curve(?=[\s}])[^{}]*\})")
+# frame of a key, eg: x1001
+_frame_pattern = re.compile(r"x(?<=\sx)({0})(?=[\s}}])".format(_number))
+# frame or value of a key
+_key_pattern = re.compile(r"(?<=\s)x?{0}(?=[\s}}])".format(_number))
+# start of a curve whose first key does not have a frame, it is at frame 1.
+_implicit_start_pattern = re.compile(r"(\{{curve(?:\s+[^\s\d.x}}-][^\s}}]*)*\s+)(?={0}[\s}}])".format(_number))
+# separator of knob values and curves joined in to one text, it is not in nuke scripts.
+_separator = "\0"
+
+
+def _get_knob_values(nodes, knobs):
+    """ Get knobs of the nodes having curves, clones gives knobs of their original. Curves edited with
+    Knob.curves are written back first.
+
+    Returns:
+        list: list of (node_store, knob name, value)
+    """
+    if numpy is None:
+        raise Exception("numpy is needed for curves")
+    items = []
+    visited = set()
+    for node in nodes:
+        node_store = node.node_store
+        if node_store.type == "clone":
+            node_store = SessionStore.get_variable(node_store.variable)
+        if id(node_store) in visited:
+            continue
+        visited.add(id(node_store))
+        node_store.sync_typed_knobs()
+        for name, value in node_store.knobs.items():
+            if (knobs is None or name in knobs) and isinstance(value, str) and "{curve" in value:
+                items.append((node_store, name, value))
+    return items
+
+
+def _explicit_frames(curve):
+    """ Get curve text with frame of every key, keys without frame are next to the previous key."""
+    parts = []
+    frame = 1.0
+    framed = False
+    for token in curve[1:-1].split():
+        if token[0] == "x":
+            try:
+                frame = float(token[1:])
+                framed = True
+                parts.append(token)
+                continue
+            except ValueError:
+                pass
+        try:
+            float(token)
+        except ValueError:
+            parts.append(token)
+            continue
+        if not framed:
+            parts.append("x" + _format_number(frame))
+        parts.append(token)
+        frame += 1
+        framed = False
+    return "{" + " ".join(parts) + "}"
+
+
+def _transform_frames(nodes, knobs, func, keep_spacing):
+    """ Change frames of all curves at once.
+
+    Args:
+        func: function which gets and returns an array of all frames
+        keep_spacing(bool): True if func does not change the spacing of frames, else frames are
+                            written for keys which do not have those.
+    Returns:
+        int: number of curves
+    """
+    items = _get_knob_values(nodes, knobs)
+    if not items:
+        return 0
+    # odd parts are curves
+    parts = _curve_pattern.split(_separator.join(value for _node_store, _name, value in items))
+    curves = parts[1::2]
+    if keep_spacing:
+        # only the first key needs its frame, the frame of others is next to it.
+        curves = _implicit_start_pattern.sub(r"\1x1 ", _separator.join(curves)).split(_separator)
+    else:
+        curves = [_explicit_frames(c) if len(_key_pattern.findall(c)) != 2 * len(_frame_pattern.findall(c))
+                  else c for c in curves]
+    # odd pieces are frames
+    pieces = _frame_pattern.split(_separator.join(curves))
+    frames = func(numpy.array(pieces[1::2], dtype=numpy.float64))
+    integers = frames.astype(numpy.int64)
+    if numpy.array_equal(integers, frames) and (len(frames) == 0 or numpy.abs(frames).max() < 1e10):
+        # same text as %.10g, which writes integers as they are up to 10 digits.
+        pieces[1::2] = ["x%d" % frame for frame in integers.tolist()]
+    else:
+        pieces[1::2] = ["x%.10g" % frame for frame in frames.tolist()]
+    parts[1::2] = "".join(pieces).split(_separator)
+
+    for (node_store, name, value), new_value in zip(items, "".join(parts).split(_separator)):
+        if new_value != value:
+            node_store.knobs[name] = new_value
+    return len(curves)
+
+
+def offset(nodes, frames, knobs=None):
+    """ Move keys of all curves of the nodes by frames.
+
+    Args:
+        nodes(list): list of Nodes
+        frames(float): number of frames to move, negative moves keys earlier
+        knobs(list): names of the knobs to change, all knobs if None
+    Returns:
+        int: number of curves
+    """
+    return _transform_frames(nodes, knobs, lambda times: times + frames, True)
+
+
+def scale(nodes, ratio, pivot=0.0, knobs=None):
+    """ Scale times of keys of all curves of the nodes around pivot frame, slopes are not changed.
+
+    Args:
+        nodes(list): list of Nodes
+        ratio(float): scale of the times, 0.5 makes the animation twice as fast
+        pivot(float): frame which is not moved
+        knobs(list): names of the knobs to change, all knobs if None
+    Returns:
+        int: number of curves
+    """
+    return _transform_frames(nodes, knobs, lambda times: pivot + (times - pivot) * ratio, ratio == 1)
+
+
+def resample(nodes, first, last, step=1.0, knobs=None):
+    """ Replace keys of all curves of the nodes with keys at every step from first to last frame, values
+    are linearly interpolated from the keys, frames out of the keys get the value of the first or last key.
+
+    Args:
+        nodes(list): list of Nodes
+        first(float): first frame
+        last(float): last frame, included
+        step(float): frames between keys
+        knobs(list): names of the knobs to change, all knobs if None
+    Returns:
+        int: number of curves
+    """
+    if first > last:
+        raise Exception("First frame {0} is after last frame {1}".format(first, last))
+    if step <= 0:
+        raise Exception("Step has to be greater than 0, not {0}".format(step))
+    items = _get_knob_values(nodes, knobs)
+    curves = []
+    node_stores = {}
+    for node_store, name, _value in items:
+        curves.extend(curve for curve in node_store.get_curves(name) if len(curve))
+        node_stores[id(node_store)] = node_store
+    if not curves:
+        return 0
+    frames = numpy.arange(first, last + step / 2.0, step, dtype=numpy.float64)
+    lengths = numpy.array([len(curve) for curve in curves])
+    ids = numpy.repeat(numpy.arange(len(curves)), lengths)
+    times = numpy.concatenate([curve.times for curve in curves])
+    values = numpy.concatenate([curve.values for curve in curves])
+
+    # each curve is moved to its own range of time, so all curves are interpolated with one call.
+    low = min(times.min(), frames[0])
+    span = max(times.max(), frames[-1]) - low + 1
+    order = numpy.lexsort((times, ids))
+    key_times = times[order] - low + ids[order] * span
+    starts = numpy.cumsum(lengths) - lengths
+    first_times = times[order][starts]
+    last_times = times[order][starts + lengths - 1]
+    # frames out of the keys of a curve gets the value of its first or last key.
+    query = numpy.clip(frames[None, :], first_times[:, None], last_times[:, None])
+    query = query - low + numpy.arange(len(curves))[:, None] * span
+    new_values = numpy.interp(query.ravel(), key_times, values[order]).reshape(len(curves), len(frames))
+
+    for curve, curve_values in zip(curves, new_values):
+        curve.set_keys(frames.copy(), curve_values)
+    for node_store in node_stores.values():
+        node_store.sync_typed_knobs()
+    return len(curves)
@@ -0,0 +1,168 @@
+"""Opt-in instrumentation of nukery hot paths.
+
+When enabled the functions listed in _TARGETS are replaced with wrappers that collect wall time and call
+count per phase and item counts (nodes parsed, knobs parsed, stack pushes...), disable puts the original
+functions back, so there is no cost at all when instrumentation is disabled.
+
+    with nukery.instrumentation.profile() as stats:
+        nukery.script_open("/file/path.nk")
+        nukery.save_script_as("/file/path_v002.nk")
+    print(stats["phases"]["parse_regex"], stats["counts"]["nodes_parsed"])
+
+Phase times are inclusive, nested phases (eg: unique_name in node_init) are counted in both.
+Stats are shared by all threads and sessions.
+"""
+import contextlib
+import functools
+import inspect
+import time
+
+from nukery import _nuke
+from nukery.parser import NukeScriptParser
+from nukery.store import SessionStore, NodeStore
+
+
+def _one(result):
+    return 1
+
+
+def _first_length(result):
+    return len(result[0])
+
+
+def _result(result):
+    return result
+
+
+def _statement_knobs(result):
+    node_data = result[0]
+    return len(node_data["knobs"]) if node_data and node_data["knobs"] else 0
+
+
+# owner, attribute, phase, count name and function to get the count from the result,
+# count of generators is the number of items yielded.
+_TARGETS = [
+    (NukeScriptParser, "_parse_with_regex", "parse_regex", "nodes_parsed", None),
+    (NukeScriptParser, "_parse_with_lexer", "parse_lexer", "nodes_parsed", None),
+    (NukeScriptParser, "from_stream", "parse_stream", "nodes_parsed", None),
+    (NukeScriptParser, "parse_knob_script", "parse_knob_script", "knobs_parsed", _first_length),
+    (NukeScriptParser, "_lex_statement", "lex_statement", "knobs_parsed", _statement_knobs),
+    (NukeScriptParser, "parse_knobs", "parse_knobs", "knobs_parsed", _first_length),
+    (NukeScriptParser, "_lex_group_body", "lex_group_body", None, None),
+    (NodeStore, "__init__", "node_init", "nodes_created", _one),
+    (NodeStore, "set_input", "set_input", None, None),
+    (NodeStore, "_get_node_script", "node_script", "nodes_rendered", _one),
+    (NodeStore, "load_group", "load_group", "groups_loaded", _result),
+    (SessionStore, "get_unique_name", "unique_name", None, None),
+    (SessionStore, "add_to_stack", "stack_push", "stack_pushes", _one),
+    (SessionStore, "set_variable", "set_variable", "variables_created", _one),
+    (SessionStore, "_SessionStore__plan_script", "plan_script", None, None),
+    (_nuke, "_write_script", "write", "bytes_written", _result),
+]
+
+_originals = {}
+_phases = {}
+_counts = {}
+
+
+def _add(phase, elapsed, count_name=None, count=0):
+    stat = _phases.get(phase)
+    if stat is None:
+        stat = _phases[phase] = {"time": 0.0, "calls": 0}
+    stat["time"] += elapsed
+    stat["calls"] += 1
+    if count_name:
+        _counts[count_name] = _counts.get(count_name, 0) + count
+
+
+def _wrap(func, phase, count_name, count_func):
+    """ Timed wrapper of func, generators are timed for each item they yield."""
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            elapsed = 0.0
+            count = 0
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    elapsed += time.perf_counter() - start
+                    count += 1
+                    yield item
+                    start = time.perf_counter()
+            finally:
+                elapsed += time.perf_counter() - start
+                _add(phase, elapsed, count_name, count)
+        return wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        _add(phase, time.perf_counter() - start, count_name, count_func(result) if count_func else 0)
+        return result
+    return wrapper
+
+
+def enable():
+    """ Start collecting stats, stats collected earlier are kept, see reset."""
+    if _originals:
+        return
+    for owner, attribute, phase, count_name, count_func in _TARGETS:
+        original = owner.__dict__[attribute]
+        _originals[(owner, attribute)] = original
+        if isinstance(original, (classmethod, staticmethod)):
+            wrapped = type(original)(_wrap(original.__func__, phase, count_name, count_func))
+        else:
+            wrapped = _wrap(original, phase, count_name, count_func)
+        setattr(owner, attribute, wrapped)
+
+
+def disable():
+    """ Stop collecting stats, original functions are restored."""
+    for (owner, attribute), original in _originals.items():
+        setattr(owner, attribute, original)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def reset():
+    """ Clear collected stats."""
+    _phases.clear()
+    _counts.clear()
+
+
+def get_stats():
+    """ Get collected stats.
+
+    Returns:
+        dict: {"phases": {phase: {"time": seconds, "calls": int}}, "counts": {name: int}}
+    """
+    return {
+        "phases": dict((phase, dict(stat)) for phase, stat in _phases.items()),
+        "counts": dict(_counts),
+    }
+
+
+@contextlib.contextmanager
+def profile():
+    """ Collect stats of the code in the context, stats are cleared at the start.
+    Yields a dict which is filled with get_stats at the end of the context.
+    """
+    was_enabled = is_enabled()
+    reset()
+    enable()
+    stats = {}
+    try:
+        yield stats
+    finally:
+        stats.update(get_stats())
+        if not was_enabled:
+            disable()
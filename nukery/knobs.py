@@ -0,0 +1,193 @@
+"""Typed knob values, animation curves of knobs as NumPy arrays.
+
+Knob values are kept as text, curves of a knob are parsed the first time those are asked for and kept on the
+node store until the knob value is set again. Edited times and values are written back in nuke curve syntax
+when the knob is read, the node is fingerprinted or the script is rendered.
+
+    translate = nukery.to_node("Transform1").knob("translate")
+    for curve in translate.curves():
+        curve.times += 10
+    nukery.save_script_as("/file/path.nk")
+
+NumPy is needed only for curves.
+"""
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# curves does not have nested braces, those can be in any depth of the knob value, like tracks of Tracker.
+_curve_pattern = re.compile(r"\{(curve(?=[\s}])[^{}]*)\}")
+
+
+def _format_number(number):
+    return "{0:.10g}".format(float(number))
+
+
+class Curve(object):
+    """ Keyframes of an animation curve, times and values are float arrays which can be edited in place
+    or replaced with arrays of another length. Other tokens of the curve like interpolation and slopes are
+    kept at the position of their key, those of keys after the first are dropped if the number of keys changes.
+    """
+    __slots__ = ("times", "values", "_tokens", "_text", "_source_times", "_source_values")
+
+    def __init__(self, text):
+        """
+        Args:
+            text(str): curve text without braces, eg: curve x1 0 x10 1.5
+        """
+        if numpy is None:
+            raise Exception("numpy is needed for curves")
+        times = []
+        values = []
+        # tokens which are not keys, tokens[i] are written before key i and the last one after all keys.
+        tokens = [[]]
+        frame = 1.0
+        for token in text.split()[1:]:
+            if token[0] == "x":
+                try:
+                    frame = float(token[1:])
+                    continue
+                except ValueError:
+                    pass
+            try:
+                value = float(token)
+            except ValueError:
+                tokens[-1].append(token)
+                continue
+            times.append(frame)
+            values.append(value)
+            tokens.append([])
+            frame += 1
+        self.times = numpy.array(times, dtype=numpy.float64)
+        self.values = numpy.array(values, dtype=numpy.float64)
+        self._tokens = tokens
+        self._text = text
+        self._source_times = self.times.copy()
+        self._source_values = self.values.copy()
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return "<Curve({0} keys) at {1}>".format(len(self.times), hex(id(self)))
+
+    def is_changed(self):
+        """ True if times or values are changed since the curve is parsed or written back."""
+        return not (numpy.array_equal(self.times, self._source_times) and
+                    numpy.array_equal(self.values, self._source_values))
+
+    def to_script(self):
+        """ Get curve text without braces, text it is parsed from is returned if it is not changed.
+
+        Returns:
+            str: curve text, eg: curve x1 0 x10 1.5
+        """
+        if not self.is_changed():
+            return self._text
+        times = numpy.asarray(self.times, dtype=numpy.float64)
+        values = numpy.asarray(self.values, dtype=numpy.float64)
+        if len(times) != len(values):
+            raise Exception("Curve has {0} times and {1} values".format(len(times), len(values)))
+        tokens = self._tokens
+        if len(tokens) != len(times) + 1:
+            tokens = [tokens[0]] + [[] for _ in range(len(times))]
+        parts = ["curve"]
+        previous = None
+        for i, (time, value) in enumerate(zip(times.tolist(), values.tolist())):
+            parts.extend(tokens[i])
+            # frame is written only if it is not next to the frame of the previous key.
+            if previous is None or time != previous + 1:
+                parts.append("x" + _format_number(time))
+            parts.append(_format_number(value))
+            previous = time
+        parts.extend(tokens[-1])
+        return " ".join(parts)
+
+    def set_keys(self, times, values):
+        """ Replace all keys of the curve, tokens of the old keys like slopes are dropped, those before the
+        first key like interpolation are kept.
+
+        Args:
+            times(numpy.ndarray): frames of the keys
+            values(numpy.ndarray): values of the keys
+        """
+        self.times = times
+        self.values = values
+        self._tokens = [self._tokens[0]] + [[] for _ in range(len(times))]
+
+    def commit(self):
+        """ Mark current times and values as written back."""
+        self._text = self.to_script()
+        self._tokens = self._tokens if len(self._tokens) == len(self.times) + 1 else \
+            [self._tokens[0]] + [[] for _ in range(len(self.times))]
+        self.times = numpy.asarray(self.times, dtype=numpy.float64)
+        self.values = numpy.asarray(self.values, dtype=numpy.float64)
+        self._source_times = self.times.copy()
+        self._source_values = self.values.copy()
+
+
+class KnobCurves(object):
+    """ Curves of a knob value and their position in it."""
+    __slots__ = ("source", "curves", "_spans")
+
+    def __init__(self, value):
+        """
+        Args:
+            value(str): knob value
+        """
+        self.source = value
+        self.curves = []
+        self._spans = []
+        for match in _curve_pattern.finditer(value):
+            self.curves.append(Curve(match.group(1)))
+            self._spans.append(match.span())
+
+    def is_changed(self):
+        return any(curve.is_changed() for curve in self.curves)
+
+    def commit(self):
+        """ Write changed curves in to the knob value.
+
+        Returns:
+            str: new knob value
+        """
+        parts = []
+        spans = []
+        position = 0
+        length = 0
+        for (start, end), curve in zip(self._spans, self.curves):
+            parts.append(self.source[position:start])
+            length += start - position
+            curve.commit()
+            text = "{" + curve.to_script() + "}"
+            parts.append(text)
+            spans.append((length, length + len(text)))
+            length += len(text)
+            position = end
+        parts.append(self.source[position:])
+        self.source = "".join(parts)
+        self._spans = spans
+        return self.source
+
+
+class Knob(str):
+    """ Knob value returned by Node.knob, it is the str value of the knob with typed access to its curves."""
+
+    def __new__(cls, value, node_store=None, name=None):
+        knob = super(Knob, cls).__new__(cls, value)
+        knob.node_store = node_store
+        knob.name = name
+        return knob
+
+    def curves(self):
+        """ Get animation curves of the knob, those are parsed on first access and kept until the knob is set
+        again. Times and values edited in place or replaced are written back when the knob is read, the node is
+        fingerprinted or the script is rendered.
+
+        Returns:
+            list: list of Curve, in the order those are in the knob value
+        """
+        return self.node_store.get_curves(self.name)
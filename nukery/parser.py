@@ -1,25 +1,90 @@
 import re
+import gzip
+import codecs
 import os.path
+from sys import intern
 from collections import OrderedDict
 
 
+class _IncompleteText(Exception):
+    """Raised by the lexer when the text ends before the statement it is reading."""
+
+
 class NukeScriptParser:
     knob_pattern = r"(^\s*)(\w+|(?:[\w\.]+)|(?:\"(?:[^\"]*)\"))\s+((?:\{(?:[^{}]*\{[^{}]*\}[^{}]*)*\})|(?:\{[^{}]+\})|(?:[^\n]+))"
     stack_command_pattern = r"\s*(\S+)\s?\$?(?:((?:[\S\s]*\}$)|(?:\S+(?:\sv\d+)?))\s*)?(?:\s*\[stack\s*(\d+)\])?"
     clone_pattern = r"(clone)\s(?:\$(\w*))?|(?:[\w\|*s*]+\s(\w+))$"
     user_knob_pattern = r"\{([\d]+)\s([\w]+)(?:[^\}]*\})"
     node_pattern = r"(?:\s*((?:clone[\s\$\w\|]+)|(?:\b\w+)|(?:[\w\.]+)))(?:\s*\{\n((?:\s*(?:[\w\.\"]+\s)(?:\{{1}[^{}]+\}{1})?(?:.*\n?)+?)+)(?:\s*\}\n*))|((?:\b(?:set|push|add_layer|^version))\s*(?:(?:.*)+?)|(?:end_group))"
+    stack_commands = ("set", "push", "add_layer", "version", "end_group")
+    # brace groups nested up to two levels are matched as one token, those does not change the depth,
+    # inside braces quotes are literal so those are not tokens there.
+    brace_group = r'\{[^{}\\]*(?:\{[^{}\\]*\}[^{}\\]*)*\}'
+    brace_token_pattern = re.compile(r'{0}|[{{}}"\\]'.format(brace_group))
+    nested_token_pattern = re.compile(r'{0}|[{{}}\\]'.format(brace_group))
+    whitespace_pattern = re.compile(r"\s*")
+    knob_head_pattern = re.compile(r'("[^"\n]*"|\S+)[ \t]*')
+    # knob lines which has no multi line values, those can be split without tracking braces.
+    # lookaheads keeps it unambiguous so failing matches do not backtrack.
+    plain_knob_line = (
+        r'[ \t]*(?!addUserKnob[ \t])[^\s{}"\\]+(?=\s)[ \t]*(?![ \t])'
+        r'[^\n{}"\\]*(?:(?:(?<!\S)"[^"\n\\]*"|\{[^\n{}\\]*(?:\{[^\n{}\\]*\}[^\n{}\\]*)*\})[^\n{}"\\]*)*\n'
+    )
+    plain_knobs_pattern = re.compile(r"(?:{0})+".format(plain_knob_line))
+    plain_node_pattern = re.compile(r"([^\s{{}}#][^\n{{}}]*?)[ \t]*\{{\n((?:{0})*)[ \t]*\}}[ \t]*(?:\n|$)".format(
+        plain_knob_line))
+    plain_knob_pattern = re.compile(r'[ \t]*([^\s{}"\\]+)[ \t]*([^\n]*)\n')
+    closing_line_pattern = re.compile(r"^[ \t]*\}[ \t]*$", re.MULTILINE)
+    inputs_line_pattern = re.compile(r"\s*inputs[ \t]+([^\n]*)\n")
+    eager_knobs_pattern = re.compile(r"^[ \t]*(name|selected)[ \t]+([^\n]*)$", re.MULTILINE)
+    published_pattern = re.compile(r"^[ \t]*published[ \t]+true[ \t]*$", re.MULTILINE)
+    set_variable_pattern = re.compile(r"^[ \t]*set[ \t]+(\S+)[ \t]+\[stack", re.MULTILINE)
+
+    REGEX = "regex"
+    LEXER = "lexer"
+    engine = REGEX
+    chunk_size = 1 << 20
+    # knob values up to this length are interned, so values repeated in many nodes like positions,
+    # "true" and channel names share one string.
+    intern_max_length = 16
 
-    def __init__(self, input_string):
+    def __init__(self, input_string, engine=None, lazy_knobs=False, lazy_groups=False):
         if os.path.isfile(input_string):
-            self.__result = list(self.from_file(input_string))
+            self.__result = list(self.from_file(input_string, engine=engine, lazy_knobs=lazy_knobs,
+                                                lazy_groups=lazy_groups))
         elif isinstance(input_string, str):
-            self.__result = list(self.parse_nuke_script(input_string))
+            self.__result = list(self.parse_nuke_script(input_string, engine=engine, lazy_knobs=lazy_knobs,
+                                                        lazy_groups=lazy_groups))
         else:
             raise Exception("input_string should be either .nk file or string")
 
     @classmethod
-    def parse_nuke_script(cls, script_text):
+    def parse_nuke_script(cls, script_text, engine=None, lazy_knobs=False, lazy_groups=False):
+        """ Parse nuke script text in to node details dicts.
+
+        Args:
+            script_text(str):
+            engine(str): parser engine to use, NukeScriptParser.REGEX or NukeScriptParser.LEXER,
+                         if None then NukeScriptParser.engine is used.
+            lazy_knobs(bool): if True knobs of the nodes are not parsed, node details has "knobs" None,
+                              "node_content" to parse them later with parse_knobs and "eager_knobs"
+                              with name and selected knobs, this always uses lexer engine.
+            lazy_groups(bool): if True nodes in groups are not yielded, node details of the group has
+                               "group_content" with the text of its body up to the matching end_group
+                               and "group_variables" with the variables set in it, this always uses
+                               lexer engine.
+        Returns:
+            list(dict): list of node details dict.
+        """
+        engine = engine or cls.engine
+        if engine == cls.REGEX and not lazy_knobs and not lazy_groups:
+            return cls._parse_with_regex(script_text)
+        elif engine in (cls.REGEX, cls.LEXER):
+            return cls._parse_with_lexer(script_text, lazy_knobs, lazy_groups)
+        raise Exception("unknown parser engine {0}".format(engine))
+
+    @classmethod
+    def _parse_with_regex(cls, script_text):
         """ Parse nuke script text, with regext pattern parses script text as nodes matches and
         then from node match it will try to match knobs and values.
 
@@ -44,7 +109,10 @@ class NukeScriptParser:
             last_node_line_end = match.end()
             last_node_content_start = match.start(2)
 
-        for node_class, node_content, stack_statement in node_data:
+        # node data is consumed while nodes are yielded, so node content can be freed by the consumer.
+        node_data.reverse()
+        while node_data:
+            node_class, node_content, stack_statement = node_data.pop()
 
             knobs, user_knobs, inputs = cls.parse_knob_script(node_content)
 
@@ -57,28 +125,467 @@ class NukeScriptParser:
                     stack_index = match.group(3)
                     node_class = None
             else:
-                type_ = "node"
-                clone_match = re.match(cls.clone_pattern, node_class)
-                if clone_match:
-                    type_ = "clone"
-                    if clone_match.group(2):
-                        node_class = None
-                        var = clone_match.group(2)
-                    elif clone_match.group(3):
-                        node_class = clone_match.group(3)
-                        var = None
+                type_, node_class, var = cls._parse_node_class(node_class)
 
             yield {
                 "type": type_,
                 "class": node_class,
-                "knobs": OrderedDict(knobs),
+                "knobs": cls._intern_knobs(knobs),
                 "inputs": inputs,
-                "user_knobs": user_knobs,
+                "user_knobs": cls._intern_user_knobs(user_knobs),
                 "var": var,
                 "stack_index": stack_index,
                 "node_content": node_content
             }
 
+    @classmethod
+    def _intern_knobs(cls, knobs):
+        """ Get knobs with interned names and short values.
+
+        Args:
+            knobs(list): list of (name, value)
+        Returns:
+            OrderedDict: knobs
+        """
+        max_length = cls.intern_max_length
+        interned = OrderedDict()
+        for name, value in knobs:
+            interned[intern(name)] = intern(value) if len(value) <= max_length else value
+        return interned
+
+    @staticmethod
+    def _intern_user_knobs(user_knobs):
+        """ Get user knobs with interned names and definitions, same user knobs are often on many nodes."""
+        return [(intern(name), intern(knob_id), intern(value)) for name, knob_id, value in user_knobs]
+
+    @classmethod
+    def _parse_node_class(cls, node_class):
+        """ Get node type, class and clone variable from node class text.
+
+        Args:
+            node_class(str): class text of the node, like `Grade` or `clone $C4f264c00`
+        Returns:
+            tuple: type, class and variable
+        """
+        type_ = "node"
+        var = None
+        if " " not in node_class and "\t" not in node_class:
+            return type_, intern(node_class), var
+        clone_match = re.match(cls.clone_pattern, node_class)
+        if clone_match:
+            type_ = "clone"
+            if clone_match.group(2):
+                node_class = None
+                var = clone_match.group(2)
+            elif clone_match.group(3):
+                node_class = intern(clone_match.group(3))
+        return type_, node_class, var
+
+    @classmethod
+    def _parse_with_lexer(cls, script_text, lazy_knobs=False, lazy_groups=False):
+        """ Parse nuke script text in a single pass, braces and quotes are tracked to find where
+        knob values and nodes end, so there is no backtracking.
+
+        Args:
+            script_text(str):
+            lazy_knobs(bool): if True knobs are not parsed
+            lazy_groups(bool): if True bodies of groups are not parsed
+        Returns:
+            list(dict): list of node details dict.
+        """
+        script_text = script_text.replace("\r", "")
+        position = 0
+        while position < len(script_text):
+            node_data, position = cls._lex_statement(script_text, position, lazy_knobs=lazy_knobs)
+            if node_data:
+                if lazy_groups and cls._has_group_body(node_data):
+                    position = cls._lex_group_body(script_text, position, node_data)
+                yield node_data
+
+    @classmethod
+    def _has_group_body(cls, node_data):
+        """ True if the node is a group with its nodes after it, published LiveGroups does not have those."""
+        if node_data["type"] != "node":
+            return False
+        if node_data["class"] == "Group":
+            return True
+        if node_data["class"] != "LiveGroup":
+            return False
+        if node_data["knobs"] is not None:
+            return node_data["knobs"].get("published", "false") == "false"
+        return not cls.published_pattern.search(node_data["node_content"])
+
+    @classmethod
+    def _lex_group_body(cls, text, position, node_data, final=True):
+        """ Find the end_group of the group, statements in it are only lexed to find where those end,
+        knobs are not read. Text of the body and variables set in it are added to node details of the group.
+
+        Args:
+            text(str): script text
+            position(int): start position of the group body, after the group node
+            node_data(dict): node details of the group
+            final(bool): False if there could be more text after this text
+        Returns:
+            int: end position of the end_group statement
+        """
+        start = position
+        depth = 1
+        while True:
+            body_end = position = cls.whitespace_pattern.match(text, position).end()
+            if position >= len(text):
+                if not final:
+                    raise _IncompleteText()
+                break
+            line_end = cls._line_end(text, position, final)
+            if text[position] == "#":
+                position = line_end + 1
+                continue
+            header = text[position:line_end].rstrip()
+            command = header.split(None, 1)[0]
+            if header[-1] == "{" and command not in cls.stack_commands:
+                content_start = line_end + 1
+                content_end, position = cls._node_body_end(text, content_start, final)
+                node_class = header[:-1].strip()
+                if node_class == "Group" or (node_class == "LiveGroup" and not cls.published_pattern.search(
+                        text, content_start, content_end)):
+                    depth += 1
+                continue
+            position = cls._value_end(text, position, line_end, final) + 1
+            if command == "end_group":
+                depth -= 1
+                if not depth:
+                    break
+        body = text[start:body_end].rstrip()
+        node_data["group_content"] = body
+        node_data["group_variables"] = cls.set_variable_pattern.findall(body)
+        return position
+
+    @staticmethod
+    def _line_end(text, position, final=True):
+        """ Get end position of the line, if the text is not final and line is not complete
+        _IncompleteText will be raised.
+        """
+        line_end = text.find("\n", position)
+        if line_end == -1:
+            if not final:
+                raise _IncompleteText()
+            line_end = len(text)
+        return line_end
+
+    @classmethod
+    def _value_end(cls, text, position, line_end, final=True):
+        """ Find end of the value starting at position, value ends at end of the line
+        where all of its braces and quotes are closed.
+
+        Args:
+            text(str): script text
+            position(int): start position of the value
+            line_end(int): end position of the line value starts
+            final(bool): False if there could be more text after this text
+        Returns:
+            int: end position of the value
+        """
+        if text.find("{", position, line_end) == -1 and text.find("\"", position, line_end) == -1 \
+                and text.find("\\", position, line_end) == -1:
+            return line_end
+
+        search = cls.brace_token_pattern.search
+        search_nested = cls.nested_token_pattern.search
+        value_start = position
+        depth = 0
+        quoted = False
+        while True:
+            match = search_nested(text, position) if depth else search(text, position)
+            if match is None or (match.start() > line_end and not depth and not quoted):
+                if match is None and (depth or quoted):
+                    if not final:
+                        raise _IncompleteText()
+                    return len(text)
+                return line_end
+            token = match.group()
+            position = match.start() + 1
+            if len(token) > 1:
+                if quoted and "\"" in token:
+                    # quote within the group closes the quoted string, braces after it counts.
+                    position = match.start() + token.index("\"") + 1
+                    quoted = False
+                else:
+                    position = match.end()
+            elif token == "\\":
+                position += 1
+            elif quoted:
+                if token == "\"":
+                    quoted = False
+            elif token == "\"":
+                # quotes are literal inside braces and in the middle of a word
+                if not depth and (position - 1 == value_start or text[position - 2] in " \t\n"):
+                    quoted = True
+            elif token == "{":
+                depth += 1
+            elif depth:
+                depth -= 1
+            if not depth and not quoted:
+                line_end = cls._line_end(text, position, final)
+
+    @classmethod
+    def _lex_node_body(cls, text, position, final=True):
+        """ Read knob lines of a node until its closing brace.
+
+        Args:
+            text(str): script text
+            position(int): start position of the node body, after the header line
+            final(bool): False if there could be more text after this text
+        Returns:
+            tuple: knobs, user knobs, inputs, node content and end position of the node
+        """
+        knobs = []
+        user_knobs = []
+        inputs = ""
+        skip_space = cls.whitespace_pattern.match
+        match_head = cls.knob_head_pattern.match
+        match_plain = cls.plain_knobs_pattern.match
+        find_plain = cls.plain_knob_pattern.findall
+        start = position
+        while True:
+            plain = match_plain(text, position)
+            if plain:
+                plain_knobs = find_plain(text, position, plain.end())
+                position = plain.end()
+                if not knobs and plain_knobs[0][0] == "inputs":
+                    inputs = plain_knobs.pop(0)[1]
+                knobs.extend(plain_knobs)
+                continue
+
+            position = skip_space(text, position).end()
+            if position >= len(text):
+                if not final:
+                    raise _IncompleteText()
+                return knobs, user_knobs, inputs, text[start:], position
+
+            line_end = cls._line_end(text, position, final)
+            head = match_head(text, position)
+            knob_name = head.group(1)
+            value_start = head.end()
+            if knob_name == "}" and value_start >= line_end:
+                content_end = text.rfind("\n", start, position) + 1
+                return knobs, user_knobs, inputs, text[start:content_end], line_end + 1
+
+            value_end = cls._value_end(text, value_start, line_end, final)
+            value = text[value_start:value_end]
+            position = value_end + 1
+
+            if knob_name == "addUserKnob":
+                user_knob_match = re.match(cls.user_knob_pattern, value)
+                knob_id = user_knob_name = ""
+                if user_knob_match:
+                    knob_id, user_knob_name = user_knob_match.groups()
+                user_knobs.append((user_knob_name, knob_id, value))
+            elif not knobs and knob_name == "inputs":
+                # if first knob script is inputs then its note knob, but inputs number
+                inputs = value
+            else:
+                knobs.append((knob_name, value))
+
+    @classmethod
+    def _scan_braces(cls, text, start, end, depth=0, quoted=False):
+        """ Get brace depth and quoted state at the end position of the text.
+
+        Args:
+            text(str): text to scan
+            start(int): start position, this has to be start of a line
+            end(int): end position
+            depth(int): brace depth at the start position
+            quoted(bool): True if the start position is within a quoted string
+        Returns:
+            tuple: brace depth and quoted state
+        """
+        if not quoted and text.find("\"", start, end) == -1 and text.find("\\", start, end) == -1:
+            return max(depth + text.count("{", start, end) - text.count("}", start, end), 0), False
+
+        position = start
+        while True:
+            if depth:
+                match = cls.nested_token_pattern.search(text, position, end)
+            else:
+                match = cls.brace_token_pattern.search(text, position, end)
+            if match is None:
+                return depth, quoted
+            token = match.group()
+            position = match.start() + 1
+            if len(token) > 1:
+                if quoted and "\"" in token:
+                    position = match.start() + token.index("\"") + 1
+                    quoted = False
+                else:
+                    position = match.end()
+            elif token == "\\":
+                position += 1
+            elif quoted:
+                if token == "\"":
+                    quoted = False
+            elif token == "\"":
+                if not depth and (position - 1 == start or text[position - 2] in " \t\n"):
+                    quoted = True
+            elif token == "{":
+                depth += 1
+            elif depth:
+                depth -= 1
+
+    @classmethod
+    def _node_body_end(cls, text, position, final=True):
+        """ Find the closing brace line of the node body, braces and quotes are tracked only up to
+        each closing brace line.
+
+        Args:
+            text(str): script text
+            position(int): start position of the node body, after the header line
+            final(bool): False if there could be more text after this text
+        Returns:
+            tuple: end position of the node content and end position of the node
+        """
+        depth = 0
+        quoted = False
+        for closing in cls.closing_line_pattern.finditer(text, position):
+            depth, quoted = cls._scan_braces(text, position, closing.start(), depth, quoted)
+            position = closing.start()
+            if not depth and not quoted:
+                return position, closing.end() + 1
+        if not final:
+            raise _IncompleteText()
+        return len(text), len(text)
+
+    @classmethod
+    def _lex_lazy_node_body(cls, text, position, final=True):
+        """ Find end of the node body without parsing the knobs, only inputs, name and selected
+        knobs are read.
+
+        Args:
+            text(str): script text
+            position(int): start position of the node body, after the header line
+            final(bool): False if there could be more text after this text
+        Returns:
+            tuple: eager knobs, inputs, node content and end position of the node
+        """
+        start = position
+        content_end, end = cls._node_body_end(text, position, final)
+
+        inputs = ""
+        inputs_match = cls.inputs_line_pattern.match(text, start, content_end)
+        if inputs_match:
+            inputs = inputs_match.group(1)
+
+        # knob looking lines could be in a multi line value as well, so those are taken only if
+        # braces and quotes are closed at that line.
+        eager_knobs = OrderedDict()
+        position = start
+        depth = 0
+        quoted = False
+        for knob_match in cls.eager_knobs_pattern.finditer(text, start, content_end):
+            depth, quoted = cls._scan_braces(text, position, knob_match.start(), depth, quoted)
+            position = knob_match.start()
+            if not depth and not quoted:
+                eager_knobs[knob_match.group(1)] = knob_match.group(2)
+
+        return eager_knobs, inputs, text[start:content_end], end
+
+    @classmethod
+    def _lex_statement(cls, text, position, final=True, lazy_knobs=False):
+        """ Lex one top level statement, which is either a node or a stack command.
+
+        Args:
+            text(str): script text
+            position(int): start position of the statement
+            final(bool): False if there could be more text after this text
+            lazy_knobs(bool): if True knobs are not parsed
+        Returns:
+            tuple: node details dict(None if the statement is not a node or stack command)
+                   and end position of the statement
+        """
+        position = cls.whitespace_pattern.match(text, position).end()
+        if position >= len(text):
+            return None, position
+
+        plain = not lazy_knobs and cls.plain_node_pattern.match(text, position)
+        if plain and plain.group(1).split(None, 1)[0] not in cls.stack_commands:
+            node_class, node_content = plain.groups()
+            knobs = cls.plain_knob_pattern.findall(node_content)
+            inputs = ""
+            if knobs and knobs[0][0] == "inputs":
+                inputs = knobs.pop(0)[1]
+            type_, node_class, var = cls._parse_node_class(node_class)
+            return {
+                "type": type_,
+                "class": node_class,
+                "knobs": cls._intern_knobs(knobs),
+                "inputs": inputs,
+                "user_knobs": [],
+                "var": var,
+                "stack_index": None,
+                "node_content": node_content
+            }, plain.end()
+
+        line_end = cls._line_end(text, position, final)
+        if text[position] == "#":
+            return None, line_end + 1
+
+        header = text[position:line_end].rstrip()
+        command = header.split(None, 1)[0]
+        if header[-1] == "{" and command not in cls.stack_commands:
+            type_, node_class, var = cls._parse_node_class(header[:-1].strip())
+            if lazy_knobs:
+                eager_knobs, inputs, node_content, end = cls._lex_lazy_node_body(text, line_end + 1, final)
+                return {
+                    "type": type_,
+                    "class": node_class,
+                    "knobs": None,
+                    "eager_knobs": eager_knobs,
+                    "inputs": inputs,
+                    "user_knobs": None,
+                    "var": var,
+                    "stack_index": None,
+                    "node_content": node_content
+                }, end
+
+            knobs, user_knobs, inputs, node_content, end = cls._lex_node_body(text, line_end + 1, final)
+            return {
+                "type": type_,
+                "class": node_class,
+                "knobs": cls._intern_knobs(knobs),
+                "inputs": inputs,
+                "user_knobs": cls._intern_user_knobs(user_knobs),
+                "var": var,
+                "stack_index": None,
+                "node_content": node_content
+            }, end
+
+        # statements can have multi line values as well, like define_window_layout_xml
+        end = cls._value_end(text, position, line_end, final)
+        if command not in cls.stack_commands:
+            return None, end + 1
+        match = re.match(cls.stack_command_pattern, text[position:end])
+        return {
+            "type": match.group(1),
+            "class": None,
+            "knobs": OrderedDict(),
+            "inputs": "",
+            "user_knobs": [],
+            "var": match.group(2),
+            "stack_index": match.group(3),
+            "node_content": None
+        }, end + 1
+
+    @classmethod
+    def parse_knobs(cls, node_content):
+        """ Parse knobs from node content, this is used to parse knobs of nodes parsed with lazy_knobs.
+
+        Args:
+            node_content(str): body text of the node, without header and closing brace
+        Returns:
+            tuple: knobs, user knobs and inputs
+        """
+        knobs, user_knobs, inputs, _node_content, _end = cls._lex_node_body(node_content, 0)
+        return cls._intern_knobs(knobs), cls._intern_user_knobs(user_knobs), inputs
+
     @classmethod
     def parse_knob_script(cls, node_content):
         knobs = []
@@ -119,15 +626,98 @@ class NukeScriptParser:
         return knobs, user_knobs, inputs
 
     @classmethod
-    def from_text(cls, text):
-        return cls.parse_nuke_script(text)
+    def from_text(cls, text, engine=None, lazy_knobs=False, lazy_groups=False):
+        return cls.parse_nuke_script(text, engine=engine, lazy_knobs=lazy_knobs, lazy_groups=lazy_groups)
+
+    @staticmethod
+    def open_file(file_path):
+        """ Open nuke script file for reading as text, gzip compressed files are decompressed.
+
+        Args:
+            file_path(str): file path
+        Returns:
+            file object
+        """
+        with open(file_path, "rb") as file_open:
+            compressed = file_open.read(2) == b"\x1f\x8b"
+        if compressed:
+            return gzip.open(file_path, "rt")
+        return open(file_path, "r")
 
     @classmethod
-    def from_file(cls, file_path):
+    def from_file(cls, file_path, engine=None, lazy_knobs=False, lazy_groups=False):
         if not os.path.exists(file_path):
             raise Exception("file {}  not found".format(file_path))
 
-        with open(file_path, "r") as file_open:
+        with cls.open_file(file_path) as file_open:
             text = file_open.read()
-        return cls.parse_nuke_script(text)
+        return cls.parse_nuke_script(text, engine=engine, lazy_knobs=lazy_knobs, lazy_groups=lazy_groups)
+
+    @classmethod
+    def from_stream(cls, stream, chunk_size=None, lazy_knobs=False, lazy_groups=False):
+        """ Parse nuke script from a file object, script is read in chunks and each node details dict is
+        yielded as soon as the statement is complete, so the whole script is never kept in memory.
+        This always uses lexer engine.
+
+        Args:
+            stream: file like object with read method, opened in text or binary(utf-8) mode.
+            chunk_size(int): number of characters to read at a time.
+            lazy_knobs(bool): if True knobs are not parsed, see parse_nuke_script
+            lazy_groups(bool): if True bodies of groups are not parsed, see parse_nuke_script
+        Returns:
+            list(dict): list of node details dict.
+        """
+        chunk_size = chunk_size or cls.chunk_size
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        position = 0
+        read_size = chunk_size
+        final = False
+        while True:
+            if not final:
+                chunk = stream.read(read_size)
+                if isinstance(chunk, bytes):
+                    chunk = decoder.decode(chunk, final=not chunk)
+                final = not chunk
+                buffer = buffer[position:] + chunk.replace("\r", "")
+                position = 0
+
+            try:
+                while position < len(buffer):
+                    start = position
+                    node_data, position = cls._lex_statement(buffer, position, final, lazy_knobs)
+                    if node_data:
+                        if lazy_groups and cls._has_group_body(node_data):
+                            position = cls._lex_group_body(buffer, position, node_data, final)
+                        yield node_data
+                    read_size = chunk_size
+            except _IncompleteText:
+                # statement is larger than what is read, read more at once next time
+                # so the statement is not lexed again for every chunk.
+                position = start
+                read_size *= 2
+                continue
+
+            if final:
+                return
+
+    @classmethod
+    def iter_file(cls, file_path, chunk_size=None, lazy_knobs=False, lazy_groups=False):
+        """ Parse nuke script file by streaming it, see from_stream.
+
+        Args:
+            file_path(str): nuke script file path
+            chunk_size(int): number of characters to read at a time.
+            lazy_knobs(bool): if True knobs are not parsed, see parse_nuke_script
+            lazy_groups(bool): if True bodies of groups are not parsed, see parse_nuke_script
+        Returns:
+            list(dict): list of node details dict.
+        """
+        if not os.path.exists(file_path):
+            raise Exception("file {}  not found".format(file_path))
+
+        with cls.open_file(file_path) as file_open:
+            for node_data in cls.from_stream(file_open, chunk_size=chunk_size, lazy_knobs=lazy_knobs,
+                                             lazy_groups=lazy_groups):
+                yield node_data
 
@@ -1,33 +1,181 @@
 import re
 import random
+import hashlib
+import contextvars
 from collections import defaultdict, OrderedDict
-from copy import deepcopy
 
-from nukery.constants import NODE_DEFAULT_INPUTS, NODE_SCRIPT_FORMAT, CLONE_KNOBS
+from nukery.constants import NODE_DEFAULT_INPUTS, NODE_SCRIPT_FORMAT, NODE_CONTENT_SCRIPT_FORMAT, CLONE_KNOBS, \
+    EAGER_KNOBS, WRITE_CLASSES, FINGERPRINT_IGNORED_KNOBS
+from nukery.parser import NukeScriptParser
+from nukery.knobs import KnobCurves
+
+_DEFAULT_SESSION = "__default__"
+# current session, parent and pending add_layer are local to the thread or asyncio task.
+_current_session = contextvars.ContextVar("nukery_current_session", default=_DEFAULT_SESSION)
+_current_parent = contextvars.ContextVar("nukery_current_parent", default="root")
+_current_add_layer = contextvars.ContextVar("nukery_current_add_layer", default=None)
+_current_batch = contextvars.ContextVar("nukery_current_batch", default=None)
+_current_bulk_connect = contextvars.ContextVar("nukery_current_bulk_connect", default=None)
+
+
+class KnobDict(OrderedDict):
+    """ Knobs of a node store, node store is told when knobs are changed so its cached script is dropped."""
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner, *args, **kwargs):
+        self._owner = None
+        super(KnobDict, self).__init__(*args, **kwargs)
+        self._owner = owner
+
+    def _changed(self):
+        if self._owner is not None:
+            self._owner.set_dirty()
+
+    def __setitem__(self, key, value):
+        super(KnobDict, self).__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super(KnobDict, self).__delitem__(key)
+        self._changed()
+
+    def pop(self, *args):
+        value = super(KnobDict, self).pop(*args)
+        self._changed()
+        return value
+
+    def popitem(self, *args, **kwargs):
+        item = super(KnobDict, self).popitem(*args, **kwargs)
+        self._changed()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super(KnobDict, self).update(*args, **kwargs)
+        self._changed()
+
+    def clear(self):
+        super(KnobDict, self).clear()
+        self._changed()
+
+    def move_to_end(self, *args, **kwargs):
+        super(KnobDict, self).move_to_end(*args, **kwargs)
+        self._changed()
+
+    def __reduce__(self):
+        # copies and pickles are plain OrderedDict, without the node store.
+        return OrderedDict, (list(self.items()),)
+
+
+class _NameNumbers(object):
+    """ Numeric suffixes used by node names of one prefix, keeps the smallest free number at hand."""
+
+    def __init__(self):
+        self.counts = {}
+        self.lowest = 1
+
+    def add(self, number):
+        self.counts[number] = self.counts.get(number, 0) + 1
+
+    def remove(self, number):
+        count = self.counts.get(number, 0) - 1
+        if count > 0:
+            self.counts[number] = count
+            return
+        self.counts.pop(number, None)
+        if 0 < number < self.lowest:
+            self.lowest = number
+
+    def next_free(self):
+        while self.lowest in self.counts:
+            self.lowest += 1
+        return self.lowest
 
 
 class SessionStore(object):
     """"""
-    __default__ = "__default__"
+    __default__ = _DEFAULT_SESSION
     __sessions = {__default__: defaultdict(list)}
     __variable = {__default__: {}}
-    _current_session = __default__
     __stack = {__default__: defaultdict(list)}
+    # reverse of __variable, {id(node_store): variable}
+    __item_variable = {__default__: {}}
+    # per parent name index, {parent: {name: node_store}} and {parent: {prefix: _NameNumbers}}
+    __names = {__default__: defaultdict(dict)}
+    __name_numbers = {__default__: defaultdict(dict)}
+    # per class index, {class: {parent: {id(node_store): node_store}}} in the order nodes are added.
+    __classes = {__default__: defaultdict(dict)}
+    # per parent selection, {parent: {id(node_store): node_store}} in the order nodes are selected.
+    __selection = {__default__: defaultdict(dict)}
+    # rendered script fragments per parent, dropped when anything in the parent or its child groups changes.
+    __script_cache = {__default__: {}}
+    # results of graph queries like upstream nodes, dropped when any connection or node changes.
+    __graph_cache = {__default__: {}}
+    # fingerprints of parent bodies, {parent: fingerprint}, dropped when a node in the parent changes.
+    __fingerprint_cache = {__default__: {}}
+    # node stores having typed knobs, {id(node_store): node_store}, edited curves are written back before render.
+    __typed_knobs = {__default__: {}}
+    # groups whose body is not loaded yet, {id(node_store): (node_store, variables set in the body)}
+    # and {variable: node_store} to load the group when one of those variables is asked.
+    __lazy_groups = {__default__: {}}
+    __lazy_variables = {__default__: {}}
+    # number of node scripts and parent bodies rendered, cached ones are not counted.
+    __render_counts = {__default__: {"node": 0, "body": 0}}
 
     def __init__(self, session):
         self.session = session
+        self._tokens = []
         if self.session not in self.__sessions.keys():
             self.__class__.__sessions[self.session] = defaultdict(list)
             self.__class__.__variable[self.session] = {}
             self.__class__.__stack[self.session] = defaultdict(list)
+            self.__class__.__item_variable[self.session] = {}
+            self.__class__.__names[self.session] = defaultdict(dict)
+            self.__class__.__name_numbers[self.session] = defaultdict(dict)
+            self.__class__.__classes[self.session] = defaultdict(dict)
+            self.__class__.__selection[self.session] = defaultdict(dict)
+            self.__class__.__script_cache[self.session] = {}
+            self.__class__.__graph_cache[self.session] = {}
+            self.__class__.__fingerprint_cache[self.session] = {}
+            self.__class__.__typed_knobs[self.session] = {}
+            self.__class__.__lazy_groups[self.session] = {}
+            self.__class__.__lazy_variables[self.session] = {}
+            self.__class__.__render_counts[self.session] = {"node": 0, "body": 0}
 
     @classmethod
     def append(cls, item):
         cls.get_current()[item.parent].append(item)
+        cls.set_dirty(item.parent)
+        cls.graph_changed()
+        cls.fingerprint_changed(item.parent)
+        if item.type == "node":
+            cls.add_name(item)
+        class_parents = cls.__classes[_current_session.get()][item.node_class]
+        if item.parent not in class_parents:
+            class_parents[item.parent] = {}
+        class_parents[item.parent][id(item)] = item
+        if item.get_knob("selected") == "true":
+            cls.set_selected(item, True)
 
     @classmethod
     def remove(cls, item):
         cls.get_current()[item.parent].remove(item)
+        cls.set_dirty(item.parent)
+        cls.graph_changed()
+        item.drop_fingerprint()
+        cls.fingerprint_changed(item.parent)
+        cls.__typed_knobs[_current_session.get()].pop(id(item), None)
+        cls.remove_lazy_group(item)
+        if item.type == "node":
+            cls.remove_name(item)
+        class_parents = cls.__classes[_current_session.get()].get(item.node_class)
+        if class_parents and item.parent in class_parents:
+            class_parents[item.parent].pop(id(item), None)
+        cls.set_selected(item, False)
         if item in cls.get_current_stack()[item.parent]:
             cls.get_current_stack()[item.parent].remove(item)
 
@@ -35,8 +183,287 @@ class SessionStore(object):
     def clear(cls):
         cls.get_current().clear()
         cls.get_current_stack().clear()
-        cls.__variable[cls._current_session].clear()
+        cls.__variable[_current_session.get()].clear()
+        cls.__item_variable[_current_session.get()].clear()
+        cls.__names[_current_session.get()].clear()
+        cls.__name_numbers[_current_session.get()].clear()
+        cls.__classes[_current_session.get()].clear()
+        cls.__selection[_current_session.get()].clear()
+        cls.__script_cache[_current_session.get()].clear()
+        cls.__graph_cache[_current_session.get()].clear()
+        cls.__fingerprint_cache[_current_session.get()].clear()
+        cls.__typed_knobs[_current_session.get()].clear()
+        cls.__lazy_groups[_current_session.get()].clear()
+        cls.__lazy_variables[_current_session.get()].clear()
+
+    @classmethod
+    def add_name(cls, item):
+        """ Add node store to the name index of its parent."""
+        name = item.name
+        cls.__names[_current_session.get()][item.parent][name] = item
+        prefix, number = NodeStore._name_pattern.match(name).groups()
+        if number is not None:
+            numbers = cls.__name_numbers[_current_session.get()][item.parent]
+            if prefix not in numbers:
+                numbers[prefix] = _NameNumbers()
+            numbers[prefix].add(int(number))
+
+    @classmethod
+    def remove_name(cls, item, name=None):
+        """ Remove node store from the name index of its parent.
+
+        Args:
+            item(NodeStore): node store
+            name(str): name the node store is indexed with, current name if None
+        """
+        names = cls.__names[_current_session.get()].get(item.parent)
+        name = item.name if name is None else name
+        if not names or names.get(name) is not item:
+            return
+        del names[name]
+        prefix, number = NodeStore._name_pattern.match(name).groups()
+        if number is not None:
+            cls.__name_numbers[_current_session.get()][item.parent][prefix].remove(int(number))
+
+    @classmethod
+    def rename(cls, item, name):
+        """ Set name knob of the node store and update the name index.
+
+        Args:
+            item(NodeStore): node store to rename
+            name(str): new name
+        """
+        indexed = cls.get_name(item.parent, item.name) is item
+        if indexed:
+            cls.remove_name(item)
+        item.knobs["name"] = name
+        if indexed:
+            cls.add_name(item)
+        # groups are found by name when graph is walked across group boundaries.
+        cls.graph_changed()
+        if item.is_group:
+            cls.__fingerprint_cache[_current_session.get()].clear()
 
+    @classmethod
+    def get_name(cls, parent, name):
+        """ Get node store by name from the name index.
+
+        Args:
+            parent(str): parent of the node, eg: root.Group1
+            name(str): name of the node
+        Returns:
+            NodeStore: node store or None if not found.
+        """
+        names = cls.__names[_current_session.get()].get(parent)
+        return names.get(name) if names else None
+
+    @classmethod
+    def get_unique_name(cls, parent, name):
+        """ Get name not used in the parent, numeric suffix of the name is replaced with
+        the smallest number not used by nodes sharing the same prefix.
+
+        Args:
+            parent(str): parent of the node, eg: root.Group1
+            name(str): name of the node
+        Returns:
+            str: unique name
+        """
+        prefix, _ = NodeStore._name_pattern.match(name).groups()
+        numbers = cls.__name_numbers[_current_session.get()].get(parent, {}).get(prefix)
+        number = numbers.next_free() if numbers else 1
+        return "{0}{1}".format(prefix, number)
+
+
+    @classmethod
+    def get_by_class(cls, class_, parents):
+        """ Get node stores of the class from the class index.
+
+        Args:
+            class_(str): node class
+            parents(list): parents to get nodes from, eg: ["root", "root.Group1"]
+        Returns:
+            list: list of NodeStore, in the order of parents and the order nodes are added.
+        """
+        class_parents = cls.__classes[_current_session.get()].get(class_)
+        if not class_parents:
+            return []
+        node_stores = []
+        for parent in parents:
+            items = class_parents.get(parent)
+            if items:
+                node_stores.extend(items.values())
+        return node_stores
+
+    @classmethod
+    def get_class_parents(cls, class_):
+        """ Get parents having nodes of the class.
+
+        Args:
+            class_(str): node class
+        Returns:
+            list: list of parents
+        """
+        class_parents = cls.__classes[_current_session.get()].get(class_)
+        if not class_parents:
+            return []
+        return [parent for parent, items in class_parents.items() if items]
+
+    @classmethod
+    def set_selected(cls, item, value):
+        """ Add node store to the selection of its parent or remove it, selecting already selected
+        node makes it the last selected.
+
+        Args:
+            item(NodeStore): node store
+            value(bool): selected or not
+        """
+        selection = cls.__selection[_current_session.get()]
+        if item.parent in selection:
+            selection[item.parent].pop(id(item), None)
+        if value:
+            if item.parent not in selection:
+                selection[item.parent] = {}
+            selection[item.parent][id(item)] = item
+
+    @classmethod
+    def get_selected(cls, parent):
+        """ Get selected node stores of the parent.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+        Returns:
+            list: list of NodeStore in the order those are selected.
+        """
+        selection = cls.__selection[_current_session.get()].get(parent)
+        return list(selection.values()) if selection else []
+
+    @classmethod
+    def get_last_selected(cls, parent):
+        """ Get last selected node store of the parent, None if nothing is selected."""
+        selection = cls.__selection[_current_session.get()].get(parent)
+        if not selection:
+            return None
+        return selection[next(reversed(selection))]
+
+    @classmethod
+    def set_dirty(cls, parent=None):
+        """ Drop cached script of the parent and the groups it is in, all cached scripts if parent is None.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+        """
+        script_cache = cls.__script_cache[_current_session.get()]
+        if not script_cache:
+            return
+        if parent is None:
+            script_cache.clear()
+            return
+        while parent:
+            script_cache.pop(parent, None)
+            parent = parent.rpartition(".")[0]
+
+    @classmethod
+    def get_graph_cache(cls):
+        """ Get memoized graph query results of the session, {key: result}."""
+        return cls.__graph_cache[_current_session.get()]
+
+    @classmethod
+    def graph_changed(cls):
+        """ Drop memoized graph query results, called when connections or nodes change."""
+        cls.__graph_cache[_current_session.get()].clear()
+
+    @classmethod
+    def get_fingerprint_cache(cls):
+        """ Get fingerprints of parent bodies of the session, {parent: fingerprint}."""
+        return cls.__fingerprint_cache[_current_session.get()]
+
+    @classmethod
+    def fingerprint_changed(cls, parent):
+        """ Drop fingerprint of the parent body and the groups it is in.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+        """
+        fingerprint_cache = cls.__fingerprint_cache[_current_session.get()]
+        if not fingerprint_cache:
+            return
+        while parent:
+            fingerprint_cache.pop(parent, None)
+            parent = parent.rpartition(".")[0]
+
+    @classmethod
+    def add_typed_knobs(cls, item):
+        """ Add node store having typed knobs, see sync_typed_knobs."""
+        cls.__typed_knobs[_current_session.get()][id(item)] = item
+
+    @classmethod
+    def sync_typed_knobs(cls):
+        """ Write edited curves of typed knobs back in to knob values, so cached scripts are dropped."""
+        for item in cls.__typed_knobs[_current_session.get()].values():
+            item.sync_typed_knobs()
+
+    @classmethod
+    def add_lazy_group(cls, item, variables):
+        """ Add group node store whose body is not loaded yet, see NodeStore.load_group.
+
+        Args:
+            item(NodeStore): group node store
+            variables(list): variables set in the body of the group
+        """
+        cls.__lazy_groups[_current_session.get()][id(item)] = (item, variables)
+        lazy_variables = cls.__lazy_variables[_current_session.get()]
+        for var in variables:
+            lazy_variables[var] = item
+
+    @classmethod
+    def remove_lazy_group(cls, item):
+        """ Remove group node store from the groups whose body is not loaded yet."""
+        _item, variables = cls.__lazy_groups[_current_session.get()].pop(id(item), (None, ()))
+        lazy_variables = cls.__lazy_variables[_current_session.get()]
+        for var in variables:
+            if lazy_variables.get(var) is item:
+                del lazy_variables[var]
+
+    @classmethod
+    def load_groups(cls, parent, recursive=False):
+        """ Load bodies of the groups the parent is in, with recursive the groups in the parent and
+        their child groups as well.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+            recursive(bool): if True groups in the parent are loaded as well
+        """
+        lazy_groups = cls.__lazy_groups[_current_session.get()]
+        if not lazy_groups:
+            return
+        parts = parent.split(".")
+        for i in range(2, len(parts) + 1):
+            group = NodeStore.get_group_store(".".join(parts[:i]))
+            if group is None:
+                break
+            group.load_group()
+        if not recursive:
+            return
+        prefix = parent + "."
+        while True:
+            pending = [item for item, _variables in lazy_groups.values()
+                       if item.parent == parent or item.parent.startswith(prefix)]
+            if not pending:
+                return
+            for item in pending:
+                item.load_group()
+
+    @classmethod
+    def get_render_counts(cls):
+        """ Get number of node scripts and parent bodies rendered in the session, {"node": int, "body": int}."""
+        return cls.__render_counts[_current_session.get()]
+
+    @classmethod
+    def reset_render_counts(cls):
+        """ Reset render counts of the session to zero."""
+        render_counts = cls.__render_counts[_current_session.get()]
+        for key in render_counts:
+            render_counts[key] = 0
 
     @classmethod
     def has_value(cls):
@@ -44,25 +471,42 @@ class SessionStore(object):
 
     @classmethod
     def set_variable(cls, var, item):
-        cls.__variable[cls._current_session][var] = item
+        variables = cls.__variable[_current_session.get()]
+        item_variables = cls.__item_variable[_current_session.get()]
+        previous = variables.get(var)
+        if previous is not None and item_variables.get(id(previous)) == var:
+            del item_variables[id(previous)]
+        variables[var] = item
+        if item is not None:
+            item_variables[id(item)] = var
+            cls.set_dirty(item.parent)
 
     @classmethod
     def get_variable(cls, var):
         if var in ("0", 0):
             return None
-        return cls.__variable[cls._current_session][var]
+        variables = cls.__variable[_current_session.get()]
+        lazy_variables = cls.__lazy_variables[_current_session.get()]
+        while var not in variables and var in lazy_variables:
+            # variable is set in a group which is not loaded yet, it can be in a group in that group.
+            lazy_variables[var].load_group()
+        return variables[var]
 
     @classmethod
     def get_current(cls):
-        return cls.__sessions[cls._current_session]
+        return cls.__sessions[_current_session.get()]
 
     @classmethod
     def get_current_stack(cls):
-        return cls.__stack[cls._current_session]
+        return cls.__stack[_current_session.get()]
 
     @classmethod
     def set_current(cls, session):
-        cls._current_session = session
+        _current_session.set(session)
+
+    @classmethod
+    def get_current_session(cls):
+        return _current_session.get()
 
     @classmethod
     def add_to_stack(cls, item):
@@ -76,36 +520,103 @@ class SessionStore(object):
 
     @classmethod
     def build_script(cls, parent=None):
+        return "\n".join(cls.iter_script(parent))
+
+    @classmethod
+    def build_script_from_list(cls, stack_list):
+        return "\n".join(cls.iter_script_from_list(stack_list))
+
+    @classmethod
+    def iter_script(cls, parent=None):
+        """ Yield script fragments of the parent, joining those with new lines gives the script text.
+
+        Args:
+            parent(str): parent to build script, eg: root.Group1, current parent if None
+        Returns:
+            generator: script fragments
+        """
         if parent is None:
             parent = NodeStore.get_current_parent()
-        return cls.__build_script(cls.get_current()[parent])
+        batch = _current_batch.get()
+        if batch is not None:
+            # changes of a batch edit are marked dirty only when those are needed.
+            batch.flush_dirty()
+        cls.sync_typed_knobs()
+        return cls._iter_body(parent)
 
     @classmethod
-    def build_script_from_list(cls, stack_list):
-        return cls.__build_script(stack_list)
+    def _iter_body(cls, parent):
+        """ Yield script fragments of the parent from the script cache, typed knobs are written back already
+        by iter_script which renders the bodies of groups with this."""
+        script_cache = cls.__script_cache[_current_session.get()]
+        if parent in script_cache:
+            return iter(script_cache[parent])
+        return cls.__iter_and_cache_script(parent)
 
     @classmethod
-    def __build_script(cls, node_store_list):
-        """Build script text from node_store list.
+    def __iter_and_cache_script(cls, parent):
+        script_cache = cls.__script_cache[_current_session.get()]
+        fragments = []
+        for fragment in cls.__iter_plan(cls.get_current()[parent]):
+            fragments.append(fragment)
+            yield fragment
+        cls.__render_counts[_current_session.get()]["body"] += 1
+        script_cache[parent] = fragments
+
+    @classmethod
+    def iter_script_from_list(cls, node_store_list):
+        """ Yield script fragments of the node_store list, node scripts are rendered only when
+        those are yielded and group bodies are yielded fragment by fragment.
+
+        Args:
+            node_store_list(list): list of NodeStore
+        Returns:
+            generator: script fragments
         """
-        _instance_copy = []
-        _all = []
+        cls.sync_typed_knobs()
+        return cls.__iter_plan(node_store_list)
+
+    @classmethod
+    def __iter_plan(cls, node_store_list):
+        for entry in reversed(cls.__plan_script(node_store_list)):
+            if isinstance(entry, tuple):
+                item, as_clone = entry
+                for fragment in item.iter_script(as_clone=as_clone):
+                    yield fragment
+            else:
+                yield entry
+
+    @classmethod
+    def __plan_script(cls, node_store_list):
+        """Plan script of the node_store list.
+
+        Nodes are walked from the tail nodes up through the inputs, so the plan is in reverse order.
+        Stack commands are added as text and nodes as (node_store, as_clone) to be rendered later.
+        """
+        _ids = set(id(item) for item in node_store_list)
+        _members = []
+
+        def _is_member(item):
+            # membership follows NodeStore.__eq__, which compares name and parent,
+            # names are read only if the item itself is not in the list.
+            if id(item) in _ids:
+                return True
+            if not _members:
+                _members.append(set((i.name, i.parent) for i in node_store_list))
+            return (item.name, item.parent) in _members[0]
+
         _duplicates = {}
         _clones = {}
-        _variables = defaultdict(str)
-        _add_layers = {}
-        _end_group = None
+        _item_variables = cls.__item_variable[_current_session.get()]
+        _new_variables = {}
         _root_item = None
         _tail_item = []
-        for var, item in cls.__variable[cls._current_session].items():
-            _variables[item] = var
-        _stacks = []
         for item in node_store_list:
             if item.node_class == "Root":
                 _root_item = item
                 continue
-            out_len = len([o for o in item.outputs if o in node_store_list])
-            _duplicates[item] = out_len
+            out_len = sum(1 for o in item.outputs if _is_member(o))
+            _duplicates[id(item)] = out_len
             if out_len == 0:
                 _tail_item.append(item)
 
@@ -115,128 +626,149 @@ class SessionStore(object):
                 _clones[item.variable].append(item)
         _sort_order = {"BackdropNode": 3, "StickyNote": 2}
         _tail_item = sorted(_tail_item, key=lambda x: _sort_order.get(x.node_class, 1))
-        last_item = _tail_item.pop(0)
-        _new_stacks_list = []
+        # both tail items and stack are popped from the end.
+        _tail_item.reverse()
+        _stack = []
+        last_item = _tail_item.pop() if _tail_item else False
+        _lines = []
 
         while last_item is not False:
             push_item = None
             if last_item is None:
                 push_item = "push 0"
-                _new_stacks_list.insert(0, push_item)
-            elif _duplicates[last_item] > 1:
-                var = _variables[last_item]
+                _lines.append(push_item)
+            elif _duplicates[id(last_item)] > 1:
+                var = _new_variables.get(id(last_item)) or _item_variables.get(id(last_item), "")
                 if not var:
-                    var = _variables[last_item] = cls.get_random_variable_name()
+                    var = _new_variables[id(last_item)] = cls.get_random_variable_name()
                 push_item = "push ${0}".format(var)
-                _new_stacks_list.insert(0, push_item)
-                if _duplicates[last_item] == 2:
-                    _duplicates[last_item] = -1
+                _lines.append(push_item)
+                if _duplicates[id(last_item)] == 2:
+                    _duplicates[id(last_item)] = -1
 
                 else:
-                    _duplicates[last_item] -= 1
+                    _duplicates[id(last_item)] -= 1
             else:
-                if _duplicates[last_item] == -1:
-                    var = _variables[last_item]
+                if _duplicates[id(last_item)] == -1:
+                    var = _new_variables.get(id(last_item)) or _item_variables.get(id(last_item), "")
                     set_item = "set {0} [stack 0]".format(var)
-                    _new_stacks_list.insert(0, set_item)
+                    _lines.append(set_item)
 
-                if last_item.variable and last_item in _clones[last_item.variable]:
+                if last_item.variable and last_item in _clones.get(last_item.variable, ()):
                     _clones[last_item.variable].remove(last_item)
                     if not _clones[last_item.variable]:
                         # there are not more clone then this will be base for other clones
                         set_item = "set {0} [stack 0]".format(last_item.variable)
-                        _new_stacks_list.insert(0, set_item)
-                        _new_stacks_list.insert(0, last_item.to_script())
+                        _lines.append(set_item)
+                        _lines.append((last_item, False))
                     else:
                         # there are more clones so this has to be clone script
-                        _new_stacks_list.insert(0, last_item.to_script(as_clone=True))
+                        _lines.append((last_item, True))
                 else:
-                    _new_stacks_list.insert(0, last_item.to_script())
+                    _lines.append((last_item, False))
 
             if push_item is None and last_item:
-                _inputs = last_item.inputs
-                for _input in _inputs:
-                    if _input not in node_store_list:
-                        _index = _inputs.index(_input)
-                        _inputs.remove(_input)
-                        _inputs.insert(_index, None)
-                _stacks = _inputs + _stacks
-
-            if _stacks:
-                last_item = _stacks.pop(0)
+                # inputs outside of the list are written as "push 0"
+                for _input in reversed(last_item.inputs):
+                    if _input is not None and not _is_member(_input):
+                        _input = None
+                    _stack.append(_input)
+
+            if _stack:
+                last_item = _stack.pop()
             elif _tail_item:
-                last_item = _tail_item.pop(0)
+                last_item = _tail_item.pop()
             else:
                 last_item = False
 
         if _root_item:
-            _new_stacks_list.insert(0, _root_item.to_script())
+            _lines.append((_root_item, False))
 
-        return "\n".join(_new_stacks_list)
+        return _lines
 
     @classmethod
     def get_random_variable_name(cls, prefix="N"):
         var = prefix + ''.join(random.choice("0123456789abcdef") for _ in range(8))
 
-        if var in cls.__variable[cls._current_session].keys():
+        if var in cls.__variable[_current_session.get()].keys():
             return cls.get_random_variable_name(prefix)
         else:
             return var
 
     def __enter__(self):
-        self.__class__._current_session = self.session
+        self._tokens.append(_current_session.set(self.session))
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.__class__._current_session = self.__default__
+        # restore the session that was current before entering.
+        _current_session.reset(self._tokens.pop())
 
     def __del__(self):
         self.__class__.__sessions[self.session] = defaultdict(list)
         self.__class__.__variable[self.session] = {}
         self.__class__.__stack[self.session] = defaultdict(list)
+        self.__class__.__item_variable[self.session] = {}
+        self.__class__.__names[self.session] = defaultdict(dict)
+        self.__class__.__name_numbers[self.session] = defaultdict(dict)
+        self.__class__.__classes[self.session] = defaultdict(dict)
+        self.__class__.__selection[self.session] = defaultdict(dict)
+        self.__class__.__script_cache[self.session] = {}
+        self.__class__.__graph_cache[self.session] = {}
+        self.__class__.__fingerprint_cache[self.session] = {}
+        self.__class__.__typed_knobs[self.session] = {}
+        self.__class__.__lazy_groups[self.session] = {}
+        self.__class__.__lazy_variables[self.session] = {}
+        self.__class__.__render_counts[self.session] = {"node": 0, "body": 0}
 
 
 class NodeStore(object):
     # stack = defaultdict(list) # needs session.
-    _current_parent = "root"
-    __add_layer = None
+    __slots__ = ("type", "_node_class", "_eager_knobs", "_knobs", "_user_knobs", "variable", "stack_index",
+                 "node_content", "_input_script", "parent", "inputs", "outputs", "_add_layer", "_node",
+                 "_script_cache", "_fingerprint", "_keep_content", "_typed_knobs", "_group_content")
     _name_pattern = re.compile("^(.*?)(\d+)?$")
 
     def __init__(self, **kwargs):
 
         self.type = kwargs.get("type")
         self._node_class = kwargs.get("class")
-        self.knobs = kwargs.get("knobs", {})
-        self.user_knobs = kwargs.get("user_knobs", [])
+        # if knobs are not parsed yet(lazy_knobs), those will be parsed from node_content on first access.
+        self._eager_knobs = kwargs.get("eager_knobs")
+        self._knobs = None
+        self._user_knobs = kwargs.get("user_knobs")
+        # (input_script, user_knobs, script) of the last render.
+        self._script_cache = None
+        # fingerprint of the node, see fingerprint.
+        self._fingerprint = None
+        # parsed curves of knobs, {knob name: KnobCurves}, see get_curves.
+        self._typed_knobs = None
+        # (body text, lazy knobs) of a group whose body is not loaded yet, see load_group.
+        self._group_content = None
+        self.parent = self.get_current_parent()
+        knobs = kwargs.get("knobs")
+        if knobs is not None or self._eager_knobs is None:
+            self._knobs = KnobDict(self, knobs or ())
+            self._user_knobs = self._user_knobs or []
         self.variable = kwargs.get("var", "")
         self.stack_index = kwargs.get("stack_index", "0")
-        self.node_content = kwargs.get("node_content", "")
+        # node content is needed only until knobs are parsed, unless it is kept to be read later.
+        self._keep_content = not kwargs.get("drop_content")
+        self.node_content = kwargs.get("node_content", "") if self._knobs is None or self._keep_content else None
         input_script = kwargs.get("inputs")
-        self.parent = self.get_current_parent()
+        self._input_script = input_script
 
         self.inputs = []
         self.outputs = []
         self._add_layer = None
+        # Node wrapping this store, created on first request.
+        self._node = None
 
-        if self.type == "node" and self.knobs.get("name") is None:
+        if self.type == "node" and self.get_knob("name") is None:
             self.knobs["name"] = "{0}1".format(self.node_class)
 
         # if node name exists in this context increment the name suffix
-        if self.type == "node" and self.get_by_name(self.name):
-            name, _ = self._name_pattern.match(self.name).groups()
-            node_numbers = set()
-
-            for item in SessionStore.get_current()[self.parent]:
-                item_name = item.name
-                match = self._name_pattern.match(item_name)
-                _name, _number = match.groups() if match else (None, None)
-                if _number is not None and _name == name:
-                    node_numbers.add(int(_number))
-
-            number_range = set(range(1, max(node_numbers) + 2))
-            missing = number_range - node_numbers
-            number = min(missing)
-            self.knobs["name"] = "{0}{1}".format(name, number)
+        if self.type == "node" and SessionStore.get_name(self.parent, self.name):
+            self.knobs["name"] = SessionStore.get_unique_name(self.parent, self.name)
 
         if self.type in ("node", "clone"):
             if input_script == "":
@@ -249,11 +781,16 @@ class NodeStore(object):
                                 "please report it to developer".format(input_script))
             for i in range(input_count):
                 item = SessionStore.pop_from_stack(self.parent)
-                self.set_input(i, item)
+                # new node has no outputs yet, so connecting it can not make a cycle.
+                self._set_input(i, item)
 
             SessionStore.append(self)
             SessionStore.add_to_stack(self)
-            if self.is_group:
+            if kwargs.get("group_content") is not None:
+                # body is loaded when it is used, end_group is already read by the parser.
+                self._group_content = (kwargs["group_content"], knobs is None)
+                SessionStore.add_lazy_group(self, kwargs.get("group_variables") or ())
+            elif self.is_group:
                 self.join_to_parent(self.name)
 
         if self.type == "set":
@@ -271,16 +808,133 @@ class NodeStore(object):
         if self.type == "end_group":
             self.un_join_last_child()
 
-        if self.__class__.__add_layer:
+        add_layer = _current_add_layer.get()
+        if add_layer:
             if self.type == "clone":
                 original = SessionStore.get_variable(self.variable)
-                original.add_layer = self.__class__.__add_layer
+                original._add_layer = add_layer
             else:
-                self._add_layer = self.__class__.__add_layer
-            self.__class__.__add_layer = None
+                self._add_layer = add_layer
+            _current_add_layer.set(None)
 
         if self.type == "add_layer":
-            self.__class__.__add_layer = self.variable
+            _current_add_layer.set(self.variable)
+
+    @property
+    def knobs(self):
+        if self._knobs is None:
+            knobs, self._user_knobs, _inputs = NukeScriptParser.parse_knobs(self.node_content)
+            self._knobs = KnobDict(self, knobs)
+            self._eager_knobs = None
+            if not self._keep_content:
+                self.node_content = None
+        return self._knobs
+
+    @knobs.setter
+    def knobs(self, knobs):
+        self._knobs = KnobDict(self, knobs)
+        self.set_dirty()
+
+    @property
+    def user_knobs(self):
+        if self._user_knobs is None:
+            _knobs = self.knobs
+        return self._user_knobs
+
+    @user_knobs.setter
+    def user_knobs(self, user_knobs):
+        self._user_knobs = user_knobs
+        self.set_dirty()
+
+    def set_dirty(self):
+        """ Drop cached script of the node and of the parents it is in."""
+        self._script_cache = None
+        self.drop_fingerprint()
+        batch = _current_batch.get()
+        if batch is not None:
+            batch.add_dirty(self)
+            return
+        if self.variable and self.type == "node":
+            # clones of this node are rendered with its knobs, those can be in any parent.
+            SessionStore.set_dirty()
+        else:
+            SessionStore.set_dirty(self.parent)
+
+    def get_curves(self, name):
+        """ Get animation curves of the knob, parsed on first access and kept until the knob value changes.
+
+        Args:
+            name(str): knob name
+        Returns:
+            list: list of nukery.knobs.Curve
+        """
+        value = self.knobs.get(name)
+        if value is None:
+            return []
+        if self._typed_knobs is None:
+            self._typed_knobs = {}
+            SessionStore.add_typed_knobs(self)
+        typed = self._typed_knobs.get(name)
+        if typed is None or typed.source != value:
+            typed = self._typed_knobs[name] = KnobCurves(str(value))
+        return typed.curves
+
+    def sync_typed_knobs(self):
+        """ Write edited curves back in to knob values, curves of knobs which are set again are dropped."""
+        if not self._typed_knobs:
+            return
+        for name, typed in list(self._typed_knobs.items()):
+            if typed.source != self.knobs.get(name):
+                del self._typed_knobs[name]
+            elif typed.is_changed():
+                self.knobs[name] = typed.commit()
+
+    @property
+    def group_loaded(self):
+        """ False if this is a group whose body is not loaded yet."""
+        return self._group_content is None
+
+    def load_group(self):
+        """ Create node stores of the group body if those are not created yet, body of groups read with
+        lazy_groups is parsed the first time nodes in the group are asked for.
+
+        Returns:
+            bool: True if the body is loaded by this call
+        """
+        if self._group_content is None:
+            return False
+        content, lazy_knobs = self._group_content
+        self._group_content = None
+        SessionStore.remove_lazy_group(self)
+        parent_token = _current_parent.set("{0}.{1}".format(self.parent, self.name))
+        add_layer_token = _current_add_layer.set(None)
+        try:
+            for node_data in NukeScriptParser.parse_nuke_script(
+                    content, engine=NukeScriptParser.LEXER, lazy_knobs=lazy_knobs, lazy_groups=True):
+                NodeStore(drop_content=not self._keep_content, **node_data)
+        finally:
+            _current_add_layer.reset(add_layer_token)
+            _current_parent.reset(parent_token)
+        return True
+
+    @property
+    def knobs_parsed(self):
+        """ False if knobs are not parsed from node content yet."""
+        return self._knobs is not None
+
+    def get_knob(self, name, default=None):
+        """ Get knob value, knobs that are read with lazy knobs are returned without parsing all knobs.
+
+        Args:
+            name(str): knob name
+            default: value to return if knob does not exist
+        Returns:
+            str: knob value
+        """
+        if self._knobs is None and name in EAGER_KNOBS:
+            return self._eager_knobs.get(name, default)
+        self.sync_typed_knobs()
+        return self.knobs.get(name, default)
 
     def to_script(self, as_clone=False):
         """ Get script text of the node, if as clone is True then it will only return clone like text
@@ -291,23 +945,59 @@ class NodeStore(object):
         Returns:
             str: script text of the node.
         """
+        SessionStore.sync_typed_knobs()
+        return "\n".join(self.iter_script(as_clone=as_clone))
+
+    def iter_script(self, as_clone=False):
+        """ Yield script fragments of the node, group nodes yields its body fragment by fragment.
+
+        Args:
+            as_clone(bool): if True it will only yield clone like text
+
+        Returns:
+            generator: script fragments of the node.
+        """
         if self.is_group:
             if as_clone:
                 raise Exception("Clone is not supported with group nodes.")
-            node_scripts = [self._get_node_script()]
-            nodes_stores = SessionStore.get_current()["{}.{}".format(self.parent, self.name)]
-            node_scripts.append(SessionStore.build_script_from_list(nodes_stores))
-            node_scripts.append("end_group")
-            return "\n".join(node_scripts)
+            yield self._get_cached_node_script()
+            if self._group_content is not None:
+                # body which is not loaded is written as it is read.
+                yield self._group_content[0]
+                yield "end_group"
+                return
+            empty = True
+            for fragment in SessionStore._iter_body("{}.{}".format(self.parent, self.name)):
+                empty = False
+                yield fragment
+            if empty:
+                yield ""
+            yield "end_group"
         else:
             if as_clone:
                 node_script = self._get_clone_script()
             else:
-                node_script = self._get_node_script()
+                node_script = self._get_cached_node_script()
                 if self.add_layer:
                     node_script = "add_layer {0}\n{1}".format(self.add_layer, node_script)
 
-            return node_script
+            yield node_script
+
+    def _get_cached_node_script(self):
+        """ Get node script, rendered again only if knobs, user knobs or inputs are changed."""
+        if self.type != "node":
+            # clone scripts depends on knobs of the original.
+            SessionStore.get_render_counts()["node"] += 1
+            return self._get_node_script()
+        input_script = self.input_script
+        cache = self._script_cache
+        if cache is not None and cache[0] == input_script and cache[1] == self._user_knobs:
+            return cache[2]
+        SessionStore.get_render_counts()["node"] += 1
+        node_script = self._get_node_script()
+        user_knobs = list(self._user_knobs) if self._user_knobs is not None else None
+        self._script_cache = (input_script, user_knobs, node_script)
+        return node_script
 
     def _get_clone_script(self):
         knob_line_format = "{0} {1}"
@@ -328,6 +1018,10 @@ class NodeStore(object):
         return NODE_SCRIPT_FORMAT.format(class_text, knob_line_script)
 
     def _get_node_script(self):
+        if self._knobs is None and self.type == "node" and self.input_script == self._input_script:
+            # knobs are never touched so it can be written as it is read.
+            return NODE_CONTENT_SCRIPT_FORMAT.format(self.node_class, self.node_content)
+
         knob_line_format = "{0} {1}"
         knob_lines = []
         if self.input_script != "":
@@ -338,8 +1032,8 @@ class NodeStore(object):
         user_knob_value = {}
         if self.type == "clone":
             original = SessionStore.get_variable(self.variable)
-            knobs = deepcopy(original.knobs)
-            knobs.update(deepcopy(self.knobs))
+            knobs = OrderedDict(original.knobs)
+            knobs.update(self.knobs)
         else:
             knobs = self.knobs
         for name, value in knobs.items():
@@ -356,10 +1050,14 @@ class NodeStore(object):
         return NODE_SCRIPT_FORMAT.format(self.node_class, knob_line_script)
 
     def delete(self):
-        for out in self.outputs:
+        if _current_bulk_connect.get() is not None:
+            # bulk connect can not restore deleted nodes when it is rolled back.
+            raise Exception("Node {0} can not be deleted in bulk connect".format(self.name))
+        for out in list(self.outputs):
             input0 = self.inputs[0] if self.inputs else None
             index = out.inputs.index(self)
-            out.set_input(index, input0)
+            # input of this node is already upstream of its outputs, so it can not make a cycle.
+            out._set_input(index, input0)
 
         for input_ in self.inputs:
             if input_:
@@ -371,17 +1069,20 @@ class NodeStore(object):
         SessionStore.remove(self)
 
     def set_input(self, index, item):
-        # check if input item is dependent on this node
-        dependants = [self]
-        while dependants:
-            dependant = dependants.pop()
-            if dependant == item:
-                raise Exception("Node {0} is dependent on {1}".format(item.name, self.name))
-            dependants.extend(dependant.outputs)
-
+        bulk_connect = _current_bulk_connect.get()
+        if bulk_connect is not None:
+            # cycles are checked once when bulk connect ends.
+            bulk_connect.add(self)
+        elif item is not None and self.is_upstream_of(item):
+            raise Exception("Node {0} is dependent on {1}".format(item.name, self.name))
+        self._set_input(index, item)
+
+    def _set_input(self, index, item):
         input_exists = index < len(self.inputs)
         if input_exists:
-            self.inputs.pop(index)
+            old_item = self.inputs.pop(index)
+            if old_item is not None and old_item is not item and not any(i is old_item for i in self.inputs):
+                old_item.remove_output(self)
         else:
             for i in range(len(self.inputs), index):
                 self.inputs.insert(i, None)
@@ -396,9 +1097,73 @@ class NodeStore(object):
                     break
         if item:
             item.add_output(self)
+        SessionStore.set_dirty(self.parent)
+        SessionStore.graph_changed()
+        self.drop_fingerprint()
+
+    def is_upstream_of(self, item):
+        """ Check if item is this node store or any node store downstream of it, each node is visited once.
+
+        Args:
+            item(NodeStore): node store
+        Returns:
+            bool: True if item is downstream
+        """
+        visited = set()
+        pending = [self]
+        while pending:
+            node_store = pending.pop()
+            if node_store is item:
+                return True
+            if id(node_store) in visited:
+                continue
+            visited.add(id(node_store))
+            pending.extend(node_store.outputs)
+        return False
+
+    @classmethod
+    def find_cycles(cls, node_stores):
+        """ Find cycles in the graph reachable downstream from the node stores, each node and connection
+        is visited once.
+
+        Args:
+            node_stores(list): node stores to start from
+        Returns:
+            list: list of cycles, each is a list of node stores where each one is an input of the next one
+                  and the last one is an input of the first one.
+        """
+        # 1 while the node is in the current path, 2 when all nodes downstream of it are visited.
+        state = {}
+        cycles = []
+        for start in node_stores:
+            if id(start) in state:
+                continue
+            state[id(start)] = 1
+            path = [start]
+            iterators = [iter(start.outputs)]
+            while iterators:
+                output = next(iterators[-1], None)
+                if output is None:
+                    state[id(path.pop())] = 2
+                    iterators.pop()
+                    continue
+                output_state = state.get(id(output))
+                if output_state == 1:
+                    cycles.append(path[[id(p) for p in path].index(id(output)):])
+                elif output_state is None:
+                    state[id(output)] = 1
+                    path.append(output)
+                    iterators.append(iter(output.outputs))
+        return cycles
 
     def unset_input(self, index):
+        bulk_connect = _current_bulk_connect.get()
+        if bulk_connect is not None:
+            bulk_connect.add(self)
         item = self.inputs.pop(index)
+        SessionStore.set_dirty(self.parent)
+        SessionStore.graph_changed()
+        self.drop_fingerprint()
         # if there are inputs after index then this should be set to None
         if len(self.inputs) > index:
             self.inputs.insert(index, None)
@@ -408,13 +1173,249 @@ class NodeStore(object):
         if item:
             item.remove_output(self)
 
+    @classmethod
+    def get_group_store(cls, parent):
+        """ Get node store of the group from its parent key, eg: root.Group1, None for root."""
+        group_parent, _, name = parent.rpartition(".")
+        if not group_parent:
+            return None
+        return SessionStore.get_name(group_parent, name)
+
+    def graph_inputs(self):
+        """ Get node stores this node depends on, across group boundaries, Input node depends on the input
+        of its group and group node depends on its Output nodes.
+
+        Returns:
+            list: list of NodeStore
+        """
+        inputs = [input_ for input_ in self.inputs if input_ is not None]
+        if self.node_class == "Input":
+            group = self.get_group_store(self.parent)
+            number = int(self.get_knob("number", "0"))
+            if group is not None and number < len(group.inputs) and group.inputs[number] is not None:
+                inputs.append(group.inputs[number])
+        elif self.is_group:
+            self.load_group()
+            inputs.extend(SessionStore.get_by_class("Output", ["{0}.{1}".format(self.parent, self.name)]))
+        return inputs
+
+    def graph_outputs(self):
+        """ Get node stores depending on this node, across group boundaries, Input nodes of the groups
+        this node is connected to and the group of Output node.
+
+        Returns:
+            list: list of NodeStore
+        """
+        outputs = list(self.outputs)
+        for output in self.outputs:
+            if not output.is_group:
+                continue
+            output.load_group()
+            numbers = set(i for i, input_ in enumerate(output.inputs) if input_ is self)
+            for input_node in SessionStore.get_by_class("Input", ["{0}.{1}".format(output.parent, output.name)]):
+                if int(input_node.get_knob("number", "0")) in numbers:
+                    outputs.append(input_node)
+        if self.node_class == "Output":
+            group = self.get_group_store(self.parent)
+            if group is not None:
+                outputs.append(group)
+        return outputs
+
+    def _walk(self, neighbours):
+        """ Node stores reachable with neighbours function, in the order those are found, without self."""
+        visited = set([id(self)])
+        result = []
+        pending = list(reversed(neighbours(self)))
+        while pending:
+            node_store = pending.pop()
+            if id(node_store) in visited:
+                continue
+            visited.add(id(node_store))
+            result.append(node_store)
+            pending.extend(reversed(neighbours(node_store)))
+        return tuple(result)
+
+    def _graph_query(self, name, func):
+        """ Result of func memoized until the graph changes."""
+        cache = SessionStore.get_graph_cache()
+        key = (name, id(self))
+        if key not in cache:
+            cache[key] = func()
+        return cache[key]
+
+    def upstream(self):
+        """ Get all node stores this node depends on, across group boundaries.
+
+        Returns:
+            tuple: node stores, nearest first
+        """
+        return self._graph_query("upstream", lambda: self._walk(NodeStore.graph_inputs))
+
+    def downstream(self):
+        """ Get all node stores depending on this node, across group boundaries.
+
+        Returns:
+            tuple: node stores, nearest first
+        """
+        return self._graph_query("downstream", lambda: self._walk(NodeStore.graph_outputs))
+
+    def connected_writes(self):
+        """ Get write node stores downstream of this node, across group boundaries.
+
+        Returns:
+            tuple: node stores
+        """
+        return self._graph_query(
+            "writes", lambda: tuple(n for n in self.downstream() if n.node_class in WRITE_CLASSES))
+
+    @classmethod
+    def topological_sort(cls, parent, recursive=False):
+        """ Get node stores of the parent ordered so every node comes after the nodes it depends on.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+            recursive(bool): if True nodes of child groups are included, ordered across group boundaries
+        Returns:
+            tuple: node stores
+        """
+        SessionStore.load_groups(parent, recursive)
+        cache = SessionStore.get_graph_cache()
+        key = ("topological_sort", parent, recursive)
+        if key in cache:
+            return cache[key]
+
+        parent_keys = [parent]
+        if recursive:
+            prefix = parent + "."
+            parent_keys.extend(k for k in SessionStore.get_current().keys() if k.startswith(prefix))
+        node_stores = [n for k in parent_keys for n in SessionStore.get_current().get(k, ())
+                       if n.type in ("node", "clone") and n.node_class != "Root"]
+        members = set(id(n) for n in node_stores)
+        in_degree = {}
+        dependants = {}
+        for node_store in node_stores:
+            inputs = node_store.graph_inputs() if recursive else node_store.inputs
+            input_ids = set(id(i) for i in inputs if i is not None and id(i) in members)
+            in_degree[id(node_store)] = len(input_ids)
+            for input_id in input_ids:
+                dependants.setdefault(input_id, []).append(node_store)
+
+        result = [n for n in node_stores if not in_degree[id(n)]]
+        for node_store in result:
+            for dependant in dependants.get(id(node_store), ()):
+                in_degree[id(dependant)] -= 1
+                if not in_degree[id(dependant)]:
+                    result.append(dependant)
+        if len(result) != len(node_stores):
+            raise Exception("Nodes in {0} have cycles".format(parent))
+
+        cache[key] = tuple(result)
+        return cache[key]
+
+    def _fingerprint_dependencies(self):
+        """ Node stores the fingerprint of this node is made of, inputs, original of clone and nodes
+        in the group."""
+        dependencies = [input_ for input_ in self.inputs if input_ is not None]
+        if self.type == "clone":
+            dependencies.append(SessionStore.get_variable(self.variable))
+        elif self.is_group:
+            self.load_group()
+            dependencies.extend(n for n in SessionStore.get_current().get("{0}.{1}".format(self.parent, self.name), ())
+                                if n.type in ("node", "clone"))
+        return dependencies
+
+    def _hash_fingerprint(self):
+        """ Hash of class, knobs, user knobs, input fingerprints and group body of the node, fingerprints
+        of the dependencies has to be computed already."""
+        original = SessionStore.get_variable(self.variable) if self.type == "clone" else self
+        knobs = sorted((k, v) for k, v in original.knobs.items() if k not in FINGERPRINT_IGNORED_KNOBS)
+        inputs = [input_._fingerprint if input_ is not None else None for input_ in self.inputs]
+        body = self.body_fingerprint("{0}.{1}".format(self.parent, self.name)) if self.is_group else None
+        content = repr((self.node_class, original.add_layer, knobs, original.user_knobs, inputs, body))
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def fingerprint(self):
+        """ Get fingerprint of the node, hash of its class, knobs, user knobs, fingerprints of its inputs
+        and for groups the nodes in it. Name, position and selection are not part of it, so same nodes
+        have same fingerprint. Fingerprint is cached until the node or anything it depends on changes.
+        Curves edited through Knob.curves are not written back here, Node.fingerprint does that.
+
+        Returns:
+            str: hex digest
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint
+        pending = [self]
+        # ids of node stores waiting for their dependencies, the path from self to the current node.
+        path = set()
+        while pending:
+            node_store = pending[-1]
+            if node_store._fingerprint is not None:
+                pending.pop()
+                continue
+            dependencies = [d for d in node_store._fingerprint_dependencies() if d._fingerprint is None]
+            if dependencies:
+                for dependency in dependencies:
+                    if id(dependency) in path or dependency is node_store:
+                        raise Exception("Node {0} has cycles".format(dependency.name))
+                path.add(id(node_store))
+                pending.extend(dependencies)
+                continue
+            pending.pop()
+            path.discard(id(node_store))
+            node_store._fingerprint = node_store._hash_fingerprint()
+        return self._fingerprint
+
+    @classmethod
+    def body_fingerprint(cls, parent):
+        """ Get fingerprint of the nodes in the parent, order of the nodes is not part of it.
+
+        Args:
+            parent(str): parent, eg: root.Group1
+        Returns:
+            str: hex digest
+        """
+        cache = SessionStore.get_fingerprint_cache()
+        if parent not in cache:
+            fingerprints = sorted(n.fingerprint() for n in SessionStore.get_current().get(parent, ())
+                                  if n.type in ("node", "clone"))
+            cache[parent] = hashlib.sha1("\n".join(fingerprints).encode("utf-8")).hexdigest()
+        return cache[parent]
+
+    def drop_fingerprint(self):
+        """ Drop cached fingerprint of the node and of everything depending on it, nodes without cached
+        fingerprint are not followed as nothing depending on those can have one."""
+        pending = [self]
+        # {class: variables} of originals, their clones are found once per class.
+        originals = {}
+        while pending:
+            node_store = pending.pop()
+            if node_store._fingerprint is not None:
+                node_store._fingerprint = None
+                SessionStore.fingerprint_changed(node_store.parent)
+                pending.extend(node_store.outputs)
+                if node_store.variable and node_store.type == "node":
+                    originals.setdefault(node_store.node_class, set()).add(node_store.variable)
+                group = self.get_group_store(node_store.parent)
+                if group is not None:
+                    pending.append(group)
+            if not pending and originals:
+                for node_class, variables in originals.items():
+                    pending.extend(n for n in SessionStore.get_by_class(
+                        node_class, SessionStore.get_class_parents(node_class))
+                        if n.type == "clone" and n.variable in variables)
+                originals.clear()
+
     def add_output(self, item):
-        if item not in self.outputs:
+        # clones are equal to their originals, so outputs are compared by identity.
+        if not any(output is item for output in self.outputs):
             self.outputs.append(item)
 
     def remove_output(self, item):
-        if item in self.outputs:
-            self.outputs.remove(item)
+        for i, output in enumerate(self.outputs):
+            if output is item:
+                del self.outputs[i]
+                return
 
     @property
     def name(self):
@@ -424,7 +1425,7 @@ class NodeStore(object):
         elif self.type != "node":
             return self.type.title()
 
-        return self.knobs.get("name")
+        return self.get_knob("name")
 
     @property
     def node_class(self):
@@ -455,7 +1456,7 @@ class NodeStore(object):
     @property
     def is_group(self):
         return self.node_class == "Group" or \
-                (self.node_class == "LiveGroup" and self.knobs.get("published", "false") == "false")
+                (self.node_class == "LiveGroup" and self.get_knob("published", "false") == "false")
 
     @classmethod
     def get_by_name(cls, name):
@@ -463,41 +1464,38 @@ class NodeStore(object):
         if "." in name:
             parent = ".".join(name.split(".")[:-1])
             name = name.split(".")[-1]
+            if not parent.startswith("root"):
+                # name is relative to the current parent, eg: Group1.Grade1
+                parent = "{0}.{1}".format(cls.get_current_parent(), parent)
+            SessionStore.load_groups(parent)
         else:
             if name == "root":  # TODO not working
                 parent = "root"
             else:
-                parent = cls._current_parent
+                parent = cls.get_current_parent()
         
-        if parent not in SessionStore.get_current():
-            return None
-
-        return next((item for item in SessionStore.get_current()[parent] if item.name == name and item.type == "node"), None)
+        return SessionStore.get_name(parent, name)
 
     @classmethod
     def get_by_class(cls, class_):
-        parent = NodeStore.get_current_parent()
-
-        if parent not in SessionStore.get_current():
-            return None
-            
-        return next((item for item in SessionStore.get_current()[parent] if item.node_class == class_), None)
+        node_stores = SessionStore.get_by_class(class_, [NodeStore.get_current_parent()])
+        return node_stores[0] if node_stores else None
 
     @classmethod
     def join_to_parent(cls, child):
-        cls._current_parent += "." + child
+        _current_parent.set(_current_parent.get() + "." + child)
 
     @classmethod
     def un_join_last_child(cls):
-        cls._current_parent = ".".join(cls._current_parent.split(".")[:-1])
+        _current_parent.set(".".join(_current_parent.get().split(".")[:-1]))
 
     @classmethod
     def set_current_parent(cls, parent):
-        cls._current_parent = parent
+        _current_parent.set(parent)
 
     @classmethod
     def get_current_parent(cls):
-        return cls._current_parent
+        return _current_parent.get()
 
     def __eq__(self, other):
         if other is None:
@@ -513,3 +1511,243 @@ class NodeStore(object):
     def __repr__(self):
         name = self.name if self.name else self.type
         return "<NodeStore({}) at {}>".format(name, hex(id(self)))
+
+
+class BatchEdit(object):
+    """ Transaction of knob changes, see nukery.batch_edit.
+
+    Knob changes made with Node in the context are applied straight away, while name uniqueness
+    validation, name and selection index updates and dropping of cached scripts are done once at the end.
+    If the context fails or names are not unique, knobs of every changed node are restored.
+    """
+
+    def __init__(self):
+        self.session = None
+        self._token = None
+        # {id(node_store): (node_store, knob items before the first change)}
+        self._snapshots = {}
+        # {id(node_store): (node_store, name before the first rename)}
+        self._renamed = {}
+        # {id(node_store): (node_store, selected)} in the order nodes are selected.
+        self._selected = {}
+        self._dirty = {}
+
+    @classmethod
+    def get_current(cls):
+        """ Get batch edit of the context, None if there is no batch edit."""
+        return _current_batch.get()
+
+    def __enter__(self):
+        if _current_batch.get() is None:
+            self.session = _current_session.get()
+            self._token = _current_batch.set(self)
+        # nested batch edit returns the outer one.
+        return _current_batch.get()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._token is None:
+            # nested batch edit is part of the outer one.
+            return
+        _current_batch.reset(self._token)
+        self._token = None
+        session_token = _current_session.set(self.session)
+        try:
+            if exc_type is not None:
+                self.rollback()
+            else:
+                self.commit()
+        finally:
+            _current_session.reset(session_token)
+
+    def _snapshot(self, node_store):
+        if id(node_store) not in self._snapshots:
+            self._snapshots[id(node_store)] = (node_store, list(node_store.knobs.items()))
+
+    def set_knob(self, node_store, key, value):
+        """ Set knob of the node store, name is validated when the batch edit is committed.
+
+        Args:
+            node_store(NodeStore): node store
+            key(str): knob name
+            value(str): knob value
+        """
+        if node_store.type == "clone" and key not in CLONE_KNOBS:
+            node_store = SessionStore.get_variable(node_store.variable)
+        self._snapshot(node_store)
+        if key == "name":
+            if node_store.type == "node" and id(node_store) not in self._renamed:
+                self._renamed[id(node_store)] = (node_store, node_store.name)
+            node_store.knobs["name"] = value
+            return
+        node_store.knobs[key] = value
+        if key == "selected":
+            self.set_selected(node_store, value in (True, "true"))
+
+    def set_knobs(self, node_store, knobs):
+        """ Set many knobs of the node store, cached script is dropped once for all of those.
+
+        Args:
+            node_store(NodeStore): node store
+            knobs(dict): knob names and values
+        """
+        plain = []
+        for key, value in knobs.items():
+            if key in ("name", "selected") or (node_store.type == "clone" and key not in CLONE_KNOBS):
+                self.set_knob(node_store, key, value)
+            else:
+                plain.append((key, value))
+        if plain:
+            self._snapshot(node_store)
+            store_knobs = node_store.knobs
+            for key, value in plain:
+                OrderedDict.__setitem__(store_knobs, key, value)
+            node_store.set_dirty()
+
+    def set_selected(self, node_store, value):
+        """ Set node store selected or not, selection index is updated when the batch edit is committed."""
+        self._snapshot(node_store)
+        if value:
+            node_store.knobs["selected"] = "true"
+        else:
+            node_store.knobs.pop("selected", None)
+        self._selected.pop(id(node_store), None)
+        self._selected[id(node_store)] = (node_store, value)
+
+    def add_dirty(self, node_store):
+        self._dirty[id(node_store)] = node_store
+
+    def flush_dirty(self):
+        """ Drop cached scripts of parents of the changed nodes, each parent once."""
+        if not self._dirty:
+            return
+        parents = set()
+        for node_store in self._dirty.values():
+            if node_store.variable and node_store.type == "node":
+                # clones of this node can be in any parent.
+                parents = None
+                break
+            parents.add(node_store.parent)
+        self._dirty.clear()
+        if parents is None:
+            SessionStore.set_dirty()
+            return
+        for parent in parents:
+            SessionStore.set_dirty(parent)
+
+    def _validate_names(self):
+        new_names = {}
+        for node_store, old_name in self._renamed.values():
+            key = (node_store.parent, node_store.name)
+            if key in new_names:
+                return node_store.name
+            new_names[key] = node_store
+        for (parent, name), node_store in new_names.items():
+            existing = SessionStore.get_name(parent, name)
+            # existing name is free if that node is renamed in this batch as well.
+            if existing is not None and existing is not node_store and id(existing) not in self._renamed:
+                return name
+        return None
+
+    def commit(self):
+        """ Validate names and update indexes, changes are rolled back if names are not unique."""
+        duplicate = self._validate_names()
+        if duplicate is not None:
+            self.rollback()
+            raise Exception("Node name already exists: {0}".format(duplicate))
+
+        renamed = [(n, o) for n, o in self._renamed.values() if SessionStore.get_name(n.parent, o) is n]
+        for node_store, old_name in renamed:
+            SessionStore.remove_name(node_store, old_name)
+        for node_store, old_name in renamed:
+            SessionStore.add_name(node_store)
+        for node_store, value in self._selected.values():
+            SessionStore.set_selected(node_store, value)
+        if self._snapshots:
+            # names and Input numbers change how graph is walked.
+            SessionStore.graph_changed()
+        self.flush_dirty()
+        self._clear()
+
+    def rollback(self):
+        """ Restore knobs of every node changed in the batch edit."""
+        for node_store, items in self._snapshots.values():
+            node_store._knobs = KnobDict(node_store, items)
+            node_store._script_cache = None
+            node_store.drop_fingerprint()
+            self.add_dirty(node_store)
+        self.flush_dirty()
+        self._clear()
+
+    def _clear(self):
+        self._snapshots.clear()
+        self._renamed.clear()
+        self._selected.clear()
+
+
+class BulkConnect(object):
+    """ Context where connections are not checked for cycles one by one, see nukery.bulk_connect.
+
+    Graph downstream of every node whose inputs are changed is checked once at the end, if there are cycles
+    or the context fails inputs of those nodes are restored.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.cycles = []
+        self._token = None
+        # {id(node_store): (node_store, inputs before the first change)}
+        self._inputs = {}
+
+    @classmethod
+    def get_current(cls):
+        """ Get bulk connect of the context, None if there is no bulk connect."""
+        return _current_bulk_connect.get()
+
+    def __enter__(self):
+        if _current_bulk_connect.get() is None:
+            self.session = _current_session.get()
+            self._token = _current_bulk_connect.set(self)
+        # nested bulk connect returns the outer one.
+        return _current_bulk_connect.get()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._token is None:
+            return
+        _current_bulk_connect.reset(self._token)
+        self._token = None
+        session_token = _current_session.set(self.session)
+        try:
+            if exc_type is not None:
+                self.rollback()
+                return
+            self.cycles = NodeStore.find_cycles([node_store for node_store, _ in self._inputs.values()])
+            if self.cycles:
+                self.rollback()
+                raise Exception("Cycles found: {0}".format("; ".join(
+                    " -> ".join(n.name for n in cycle + cycle[:1]) for cycle in self.cycles)))
+            self._inputs.clear()
+        finally:
+            _current_session.reset(session_token)
+
+    def add(self, node_store):
+        """ Add node store whose inputs are changed."""
+        if id(node_store) not in self._inputs:
+            self._inputs[id(node_store)] = (node_store, list(node_store.inputs))
+
+    def rollback(self):
+        """ Restore inputs of every node changed in the bulk connect."""
+        for node_store, _inputs in self._inputs.values():
+            # fingerprints of the changed wiring, taken in the bulk connect.
+            node_store.drop_fingerprint()
+            for input_ in node_store.inputs:
+                if input_ is not None:
+                    input_.remove_output(node_store)
+        for node_store, inputs in self._inputs.values():
+            node_store.inputs = inputs
+            for input_ in inputs:
+                if input_ is not None:
+                    input_.add_output(node_store)
+            node_store.drop_fingerprint()
+            SessionStore.set_dirty(node_store.parent)
+        SessionStore.graph_changed()
+        self._inputs.clear()
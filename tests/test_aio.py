@@ -0,0 +1,57 @@
+import os
+import asyncio
+import tempfile
+import unittest
+
+import nukery
+from nukery import aio
+
+
+class TestAio(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestAio, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_open_script(self):
+        nukery.script_open(self.file_path)
+        expected = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+        sessions = [nukery.SessionStore("aio{0}".format(i)) for i in range(4)]
+
+        async def open_all():
+            await asyncio.gather(*[aio.open_script(self.file_path, session=s) for s in sessions])
+
+        asyncio.run(open_all())
+        results = []
+        for session in sessions:
+            with session:
+                results.append([n.full_name for n in nukery.all_nodes(recursive=True)])
+                nukery.script_clear()
+        default_nodes = nukery.all_nodes()
+
+        self.assertEqual([expected] * 4, results)
+        self.assertEqual([], default_nodes)
+
+    def test_save_and_paste(self):
+        session = nukery.SessionStore("aio_save")
+        paste_session = nukery.SessionStore("aio_paste")
+        file_path = os.path.join(tempfile.mkdtemp(), "saved.nk")
+
+        async def save_and_paste():
+            await aio.open_script(self.file_path, session=session)
+            await aio.save_script(file_path, session=session)
+            return await aio.paste(file_path, session=paste_session)
+
+        pasted = asyncio.run(save_and_paste())
+        with session:
+            expected = sorted(n.full_name for n in nukery.all_nodes(recursive=True))
+            nukery.script_clear()
+        with paste_session:
+            result = sorted(n.full_name for n in nukery.all_nodes(recursive=True))
+            nukery.script_clear()
+        os.remove(file_path)
+        os.rmdir(os.path.dirname(file_path))
+
+        self.assertEqual(expected, result)
+        self.assertTrue(pasted)
@@ -0,0 +1,31 @@
+import os
+import unittest
+
+import nukery
+from nukery.batch import map_scripts
+
+
+def count_nodes(path):
+    return len(nukery.all_nodes(recursive=True))
+
+
+class TestBatch(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestBatch, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_map_scripts(self):
+        nukery.script_open(self.file_path)
+        expected = len(nukery.all_nodes(recursive=True))
+        nukery.script_clear()
+        missing_path = os.path.join(os.path.dirname(__file__), "files/missing.nk")
+        paths = [self.file_path] * 5 + [missing_path]
+
+        results = list(map_scripts(paths, count_nodes, workers=2, chunksize=2))
+        counts = [r.result for r in results if r.path == self.file_path]
+        errors = [r for r in results if r.error]
+
+        self.assertEqual([expected] * 5, counts)
+        self.assertEqual([missing_path], [r.path for r in errors])
+        self.assertIn("not found", errors[0].error)
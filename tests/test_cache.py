@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import nukery
+from nukery.cache import ParseCache
+from nukery.parser import NukeScriptParser
+
+
+class TestParseCache(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestParseCache, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_load(self):
+        expected = list(NukeScriptParser.from_file(self.file_path))
+        for key in (ParseCache.STAT, ParseCache.CONTENT):
+            cache = ParseCache(self.cache_dir, key=key)
+            first = cache.load(self.file_path)
+            second = cache.load(self.file_path)
+            lazy = cache.load(self.file_path, lazy_knobs=True)
+
+            self.assertEqual(expected, first)
+            self.assertEqual(expected, second)
+            self.assertIsNone(lazy[1]["knobs"])
+            self.assertEqual((1, 2), (cache.hits, cache.misses))
+            cache.clear()
+
+    def test_eviction(self):
+        cache = ParseCache(self.cache_dir)
+        cache.load(self.file_path, engine=NukeScriptParser.LEXER)
+        lexer_size = cache.size()
+        cache.load(self.file_path, engine=NukeScriptParser.REGEX)
+        # entries are written an hour ago, so their times do not tie with the get even with coarse mtime.
+        written = time.time() - 3600
+        for engine in (NukeScriptParser.LEXER, NukeScriptParser.REGEX):
+            entry_path = cache._entry_path(cache.cache_key(self.file_path, engine=engine))
+            os.utime(entry_path, (written, written))
+        # lexer entry is used last, so regex entry is the one to evict.
+        cache.get(self.file_path, engine=NukeScriptParser.LEXER)
+        cache.max_size = lexer_size
+        cache.evict()
+
+        self.assertEqual(1, cache.stats()["entries"])
+        self.assertIsNotNone(cache.get(self.file_path, engine=NukeScriptParser.LEXER))
+        self.assertIsNone(cache.get(self.file_path, engine=NukeScriptParser.REGEX))
+
+    def test_script_open(self):
+        nukery.script_open(self.file_path)
+        expected = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+
+        cache = ParseCache(self.cache_dir)
+        results = []
+        for _ in range(2):
+            nukery.script_open(self.file_path, cache=cache)
+            results.append([n.full_name for n in nukery.all_nodes(recursive=True)])
+            nukery.script_clear()
+
+        self.assertEqual([expected, expected], results)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import nukery
+from nukery import compare
+
+
+class TestCompare(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestCompare, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_diff(self):
+        temp_dir = tempfile.mkdtemp()
+        path_a = os.path.join(temp_dir, "a.nk")
+        path_b = os.path.join(temp_dir, "b.nk")
+        nukery.script_open(self.file_path, engine="lexer")
+        nukery.save_script_as(path_a)
+        nukery.to_node("Grade4")["black"] = "0.5"
+        nukery.to_node("Grade3")["name"] = "Lift"
+        nukery.to_node("Copy1").set_input(1, nukery.to_node("CheckerBoard1"))
+        nukery.delete(nukery.to_node("Premult1"))
+        nukery.create_node("Blur", name="BlurNew")
+        nukery.save_script_as(path_b)
+        nukery.script_clear()
+
+        same = list(nukery.diff(path_a, path_a, engine="lexer"))
+        changes = list(nukery.diff(path_a, path_b, engine="lexer"))
+        shutil.rmtree(temp_dir)
+
+        self.assertEqual([], same)
+        found = dict(((c.change, c.name, c.knob), c) for c in changes)
+        self.assertEqual("0.5", found[(compare.KNOB, "root.Grade4", "black")].new)
+        self.assertEqual("-0.33", found[(compare.KNOB, "root.Grade4", "black")].old)
+        self.assertEqual("root.Grade3", found[(compare.RENAMED, "root.Lift", None)].old)
+        self.assertNotIn((compare.REMOVED, "root.Grade3", None), found)
+        self.assertEqual("root.CheckerBoard1", found[(compare.REWIRED, "root.Copy1", None)].new[1])
+        self.assertIn((compare.REMOVED, "root.Premult1", None), found)
+        self.assertIn((compare.ADDED, "root.BlurNew", None), found)
+        # removed nodes come after all other changes.
+        self.assertEqual(compare.REMOVED, changes[-1].change)
+
+    def test_diff_many_renamed(self):
+        temp_dir = tempfile.mkdtemp()
+        path_a = os.path.join(temp_dir, "a.nk")
+        path_b = os.path.join(temp_dir, "b.nk")
+        for i in range(2000):
+            nukery.create_node("Grade", name="Grade{0}".format(i), white=str(i))
+        nukery.save_script_as(path_a)
+        for i in range(0, 2000, 2):
+            nukery.to_node("Grade{0}".format(i))["name"] = "Lift{0}".format(i)
+        nukery.save_script_as(path_b)
+        nukery.script_clear()
+
+        changes = list(nukery.diff(path_a, path_b, engine="lexer"))
+        shutil.rmtree(temp_dir)
+
+        self.assertEqual(1000, len(changes))
+        self.assertEqual(set([compare.RENAMED]), set(c.change for c in changes))
+        found = dict((c.name, c.old) for c in changes)
+        self.assertEqual("root.Grade1998", found["root.Lift1998"])
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+import nukery
+from nukery import curves, knobs
+
+
+@unittest.skipIf(knobs.numpy is None, "numpy is not installed")
+class TestCurves(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestCurves, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_offset(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade["white"] = "{{curve x5 1 2 s0 x9 5} 0.5 {curve L 1 2 3}}"
+        grade["black"] = "{curve x1 0 x10 1}"
+        count = curves.offset([grade], 10, knobs=["white"])
+        white, black = grade["white"], grade["black"]
+        curves.offset([grade], -0.5, knobs=["black"])
+        half = grade["black"]
+        nukery.script_clear()
+
+        self.assertEqual(2, count)
+        self.assertEqual("{{curve x15 1 2 s0 x19 5} 0.5 {curve L x11 1 2 3}}", white)
+        self.assertEqual("{curve x1 0 x10 1}", black)
+        self.assertEqual("{curve x0.5 0 x9.5 1}", half)
+
+    def test_offset_typed_knobs(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade["white"] = "{curve x1 0 x10 1}"
+        edited = grade.knob("white").curves()
+        edited[0].values += 1
+        curves.offset(nukery.all_nodes(recursive=True), 5)
+        value = grade["white"]
+        new_curves = grade.knob("white").curves()
+        nukery.script_clear()
+
+        # curves edited through Knob.curves are written back before the offset.
+        self.assertEqual("{curve x6 1 x15 2}", value)
+        self.assertEqual([6, 15], new_curves[0].times.tolist())
+
+    def test_scale(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade["white"] = "{{curve x5 1 2 s0 x9 5} 0.5 {curve L 1 2 3}}"
+        curves.scale([grade], 2, pivot=15)
+        value = grade["white"]
+        nukery.script_clear()
+
+        self.assertEqual("{{curve x-5 1 x-3 2 s0 x3 5} 0.5 {curve L x-13 1 x-11 2 x-9 3}}", value)
+
+    def test_resample(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade["white"] = "{{curve x1 0 x11 10} {curve x5 1 x7 3}}"
+        count = curves.resample([grade], 1, 11, step=5)
+        value = grade["white"]
+        # same number of keys, slope of the old key is not kept on the new one.
+        grade["black"] = "{curve L x1 0 x11 1 s0 x31 3}"
+        curves.resample([grade], 11, 13, knobs=["black"])
+        black = grade["black"]
+        with self.assertRaises(Exception):
+            curves.resample([grade], 10, 1)
+        with self.assertRaises(Exception):
+            curves.resample([grade], 1, 10, step=0)
+        unchanged = grade["black"] == black
+        nukery.script_clear()
+
+        self.assertEqual(2, count)
+        self.assertEqual("{{curve x1 0 x6 5 x11 10} {curve x1 1 x6 2 x11 3}}", value)
+        self.assertEqual("{curve L x11 1 1.1 1.2}", black)
+        self.assertTrue(unchanged)
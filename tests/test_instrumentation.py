@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import nukery
+from nukery import instrumentation
+from nukery.store import NodeStore
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestInstrumentation, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_profile(self):
+        original_init = NodeStore.__dict__["__init__"]
+        temp_dir = tempfile.mkdtemp()
+        with instrumentation.profile() as stats:
+            self.assertTrue(instrumentation.is_enabled())
+            nukery.script_open(self.file_path)
+            node_count = len(nukery.all_nodes(recursive=True))
+            nukery.to_node("Grade4")["label"] = "\u00e9tal\u00f6n"
+            nukery.save_script_as(os.path.join(temp_dir, "saved.nk"))
+            nukery.save_script_as(os.path.join(temp_dir, "saved.nk.gz"), compress=True)
+            saved_size = sum(os.path.getsize(os.path.join(temp_dir, name)) for name in ("saved.nk", "saved.nk.gz"))
+        nukery.script_clear()
+        shutil.rmtree(temp_dir)
+
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertIs(original_init, NodeStore.__dict__["__init__"])
+        self.assertEqual(1, stats["phases"]["parse_regex"]["calls"])
+        self.assertGreater(stats["phases"]["node_init"]["time"], 0)
+        # Root and stack commands are created as node stores as well.
+        self.assertGreater(stats["counts"]["nodes_created"], node_count)
+        self.assertEqual(stats["counts"]["nodes_parsed"], stats["counts"]["nodes_created"])
+        self.assertGreater(stats["counts"]["knobs_parsed"], node_count)
+        self.assertEqual(saved_size, stats["counts"]["bytes_written"])
+
+    def test_disabled(self):
+        instrumentation.reset()
+        nukery.script_open(self.file_path)
+        nukery.script_clear()
+        self.assertEqual({"phases": {}, "counts": {}}, instrumentation.get_stats())
+
+        instrumentation.enable()
+        instrumentation.enable()
+        nukery.script_open(self.file_path, stream=True)
+        instrumentation.disable()
+        nukery.script_clear()
+        stats = instrumentation.get_stats()
+        instrumentation.reset()
+
+        self.assertEqual(1, stats["phases"]["parse_stream"]["calls"])
+        self.assertIn("lex_statement", stats["phases"])
@@ -0,0 +1,101 @@
+import os
+import unittest
+from unittest import mock
+
+import nukery
+from nukery import knobs
+
+
+@unittest.skipIf(knobs.numpy is None, "numpy is not installed")
+class TestKnobs(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TestKnobs, self).__init__(*args, **kwargs)
+        self.file_path = os.path.join(os.path.dirname(__file__), "files/test_file.nk")
+
+    def test_curve(self):
+        curve = knobs.Curve("curve L x1 0 s0 2 x10 1.5 3")
+        times, values = curve.times.tolist(), curve.values.tolist()
+        unchanged = curve.to_script()
+        curve.times += 10
+        shifted = curve.to_script()
+        curve.values = curve.values[:2]
+        curve.times = curve.times[:2]
+        shortened = curve.to_script()
+
+        self.assertEqual([1, 2, 10, 11], times)
+        self.assertEqual([0, 2, 1.5, 3], values)
+        self.assertEqual("curve L x1 0 s0 2 x10 1.5 3", unchanged)
+        self.assertEqual("curve L x11 0 s0 2 x20 1.5 3", shifted)
+        self.assertEqual("curve L x11 0 2", shortened)
+
+    def test_knob_curves(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade["white"] = "{{curve x1 0 x10 1} 0.5 {curve x1 1 x5 2}}"
+        knob = grade.knob("white")
+        curves = knob.curves()
+        cached = knob.curves() is curves and grade.knob("white").curves() is curves
+        # scripts are cached before the curves are edited.
+        nukery.save_script_as(os.devnull)
+        curves[0].values *= 2
+        curves[1].times -= 1
+        text = nukery.get_script_text()
+        value = grade["white"]
+        same_curves = grade.knob("white").curves() is curves
+        grade["white"] = "{curve x1 3}"
+        new_curves = grade.knob("white").curves()
+        nukery.script_clear()
+
+        self.assertTrue(isinstance(knob, str))
+        self.assertEqual(2, len(curves))
+        self.assertTrue(cached)
+        self.assertEqual("{{curve x1 0 x10 2} 0.5 {curve x0 1 x4 2}}", value)
+        self.assertIn(" white {{curve x1 0 x10 2} 0.5 {curve x0 1 x4 2}}", text)
+        self.assertTrue(same_curves)
+        self.assertEqual([3], new_curves[0].values.tolist())
+
+    def test_knob_curves_read(self):
+        nukery.script_open(self.file_path)
+        grade = nukery.to_node("Grade4")
+        grade7 = nukery.to_node("Grade7")
+        grade["white"] = "{curve x1 0 x10 1}"
+        fingerprints = (grade.fingerprint(), grade7.fingerprint(), nukery.fingerprint())
+        grade.knob("white").curves()[0].values *= 2
+        value = grade["white"]
+        grade.knob("white").curves()[0].values += 1
+        changed = (grade.fingerprint(), grade7.fingerprint(), nukery.fingerprint())
+        knob_values = grade.knobs()["white"]
+        nukery.script_clear()
+
+        self.assertEqual("{curve x1 0 x10 2}", value)
+        self.assertEqual("{curve x1 1 x10 3}", knob_values)
+        for fingerprint, changed_fingerprint in zip(fingerprints, changed):
+            self.assertNotEqual(fingerprint, changed_fingerprint)
+
+    def test_knob_curves_many_nodes(self):
+        grades = []
+        for _ in range(20):
+            nukery.clear_selection()
+            with nukery.create_node("Group"):
+                for i in range(10):
+                    grade = nukery.create_node("Grade", white="{{curve x1 {0} x10 1}}".format(i))
+                    grade.knob("white").curves()
+                    grades.append(grade)
+        grades[0].knob("white").curves()[0].values += 1
+        is_changed = knobs.KnobCurves.is_changed
+        with mock.patch.object(knobs.KnobCurves, "is_changed", autospec=True, side_effect=is_changed) as patched:
+            nukery.get_script_text()
+            script_calls = patched.call_count
+            nukery.fingerprint()
+            fingerprint_calls = patched.call_count - script_calls
+            grades[5].fingerprint()
+            cached_calls = patched.call_count - script_calls - fingerprint_calls
+        value = grades[0]["white"]
+        nukery.script_clear()
+
+        # curves are checked for changes once for each call, not for each group or node.
+        self.assertEqual(len(grades), script_calls)
+        self.assertEqual(len(grades), fingerprint_calls)
+        self.assertEqual(len(grades), cached_calls)
+        self.assertEqual("{curve x1 1 x10 2}", value)
@@ -1,4 +1,6 @@
+import gzip
 import os.path
+import tempfile
 import unittest
 import nukery
 
@@ -16,6 +18,98 @@ class TestNukery(unittest.TestCase):
         nukery.script_clear()
         self.assertTrue(self.all_nodes)
 
+    def test_script_open_stream(self):
+        nukery.script_open(self.file_path)
+        expected = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, stream=True)
+        result = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+        self.assertEqual(expected, result)
+
+    def test_script_open_lazy_knobs(self):
+        nukery.script_open(self.file_path)
+        expected_names = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        expected_selected = [n.name for n in nukery.selected_nodes()]
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, lazy_knobs=True)
+        names = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        selected = [n.name for n in nukery.selected_nodes()]
+        parsed = [n.name for n in nukery.all_nodes() if n.node_store.knobs_parsed]
+        roto_output = nukery.to_node("Roto1")["output"]
+        roto_parsed = nukery.to_node("Roto1").node_store.knobs_parsed
+        nukery.script_clear()
+
+        self.assertEqual(expected_names, names)
+        self.assertEqual(expected_selected, selected)
+        self.assertEqual([], parsed)
+        self.assertEqual("alpha", roto_output)
+        self.assertTrue(roto_parsed)
+
+    def test_script_open_drop_content(self):
+        nukery.script_open(self.file_path, engine="lexer")
+        expected_text = nukery.get_script_text()
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, engine="lexer", drop_content=True)
+        text = nukery.get_script_text()
+        contents = [n.node_store.node_content for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, lazy_knobs=True, drop_content=True)
+        roto = nukery.to_node("Roto1").node_store
+        lazy_content = roto.node_content
+        roto_output = roto.knobs["output"]
+        parsed_content = roto.node_content
+        grades = nukery.all_nodes("Grade")
+        shared_knobs = grades[0].node_store.knobs.keys() & grades[1].node_store.knobs.keys()
+        interned = all(next(k for k in grades[0].node_store.knobs if k == name) is
+                       next(k for k in grades[1].node_store.knobs if k == name) for name in shared_knobs)
+        nukery.script_clear()
+
+        self.assertEqual(expected_text, text)
+        self.assertEqual(set([None]), set(contents))
+        self.assertTrue(lazy_content)
+        self.assertEqual("alpha", roto_output)
+        self.assertIsNone(parsed_content)
+        self.assertTrue(shared_knobs)
+        self.assertTrue(interned)
+
+    def test_script_open_lazy_groups(self):
+        nukery.script_open(self.file_path, engine="lexer")
+        expected_names = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        expected_fingerprint = nukery.fingerprint()
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, lazy_groups=True)
+        group = nukery.to_node("Group1").node_store
+        lazy_parents = list(nukery.SessionStore.get_current().keys())
+        text = nukery.get_script_text()
+        grade = nukery.to_node("Group1.Grade1")
+        loaded = group.group_loaded
+        names = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        fingerprint = nukery.fingerprint()
+        nukery.script_clear()
+
+        nukery.script_open(self.file_path, lazy_groups=True)
+        with nukery.to_node("Group1"):
+            group_names = [n.name for n in nukery.all_nodes()]
+        upstream = [n.name for n in nukery.to_node("Copy1").upstream()]
+        nukery.script_clear()
+
+        self.assertEqual(["root"], lazy_parents)
+        # body of the group is written as it is read.
+        self.assertIn("end_group", text)
+        self.assertIn("\n Grade {\n  name Grade1\n  xpos 4\n  ypos 77\n }\n", text)
+        self.assertEqual("root.Group1", grade.parent)
+        self.assertTrue(loaded)
+        self.assertEqual(sorted(expected_names), sorted(names))
+        self.assertEqual(expected_fingerprint, fingerprint)
+        self.assertEqual(["Input1", "Grade1", "Transform1", "Merge1", "Output1"], group_names)
+        self.assertIn("Merge1", upstream)
+
     def test_all_nodes(self):
         expected_root_names = set(['ColorWheel1', 'Keylight1', 'Grade9', 'Grade10', 'Grade11', 'ColorBars1', 'Primatte1', 'Group1', 'Roto1', 'RotoPaint1', 'CheckerBoard1', 'Grade3', 'Grade8', 'Grade1', 'Grade2', 'Grade4', 'Grade5', 'Grade6', 'Grade7', 'Copy1', 'Premult1', 'Viewer1'])
         expected_group1 = set(['Input1', 'Grade1', 'Transform1', 'Merge1', 'Output1'])
@@ -36,4 +130,367 @@ class TestNukery(unittest.TestCase):
         result = set([n.name for n in nukery.selected_nodes()])
         nukery.script_clear()
 
-        self.assertEqual(expected_result, result)
\ No newline at end of file
+        self.assertEqual(expected_result, result)
+
+    def test_node_names(self):
+        grades = [nukery.create_node("Grade") for _ in range(3)]
+        names = [n.name for n in grades]
+        nukery.delete(grades[1])
+        refilled = nukery.create_node("Grade").name
+        grades[2].set_name("Graded")
+        renamed = nukery.to_node("Graded")
+        old_name = nukery.to_node("Grade3")
+        with self.assertRaises(Exception):
+            grades[0].set_name("Graded")
+        nukery.script_clear()
+        cleared = nukery.to_node("Grade1")
+
+        self.assertEqual(["Grade1", "Grade2", "Grade3"], names)
+        self.assertEqual("Grade2", refilled)
+        self.assertIs(grades[2].node_store, renamed.node_store)
+        self.assertIsNone(old_name)
+        self.assertIsNone(cleared)
+
+    def test_get_script_text_keeps_inputs(self):
+        nukery.script_open(self.file_path)
+        expected = [(n.name, [i.name if i else None for i in n.get_inputs()]) for n in nukery.all_nodes()]
+        nukery.get_script_text(selected=True)
+        result = [(n.name, [i.name if i else None for i in n.get_inputs()]) for n in nukery.all_nodes()]
+        nukery.script_clear()
+        self.assertEqual(expected, result)
+
+    def test_clone_script(self):
+        temp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(temp_dir, "clones.nk")
+        with open(file_path, "w") as f:
+            f.write("Grade {\n name Grade1\n}\nset Cb1 [stack 0]\nclone $Cb1 {\n inputs 0\n xpos 100\n}\n"
+                    "Grade {\n inputs 0\n name Grade2\n}\nset Cb2 [stack 0]\n")
+        nukery.script_open(file_path)
+        text = nukery.get_script_text()
+        # original without clones in the list is written as a plain node.
+        nukery.to_node("Grade2").set_selected(True)
+        selected_text = nukery.get_script_text(selected=True)
+        nukery.script_clear()
+        os.remove(file_path)
+        os.rmdir(temp_dir)
+
+        self.assertIn("clone $Cb1", text)
+        self.assertIn("Grade2", selected_text)
+
+    def test_save_script_as(self):
+        nukery.script_open(self.file_path)
+        expected_names = sorted(n.full_name for n in nukery.all_nodes(recursive=True))
+        expected_text = nukery.get_script_text()
+        temp_dir = tempfile.mkdtemp()
+        file_paths = [os.path.join(temp_dir, "saved.nk"), os.path.join(temp_dir, "saved.nk.gz")]
+        nukery.save_script_as(file_paths[0])
+        nukery.save_script_as(file_paths[1], compress=True)
+        nukery.script_clear()
+        texts = []
+        results = []
+        for file_path, compress in zip(file_paths, (False, True)):
+            with (gzip.open(file_path, "rt") if compress else open(file_path)) as f:
+                texts.append(f.read())
+            nukery.script_open(file_path)
+            results.append(sorted(n.full_name for n in nukery.all_nodes(recursive=True)))
+            nukery.script_clear()
+            os.remove(file_path)
+        os.rmdir(temp_dir)
+
+        self.assertEqual(expected_names, results[0])
+        self.assertEqual(expected_names, results[1])
+        self.assertTrue(expected_text.startswith("Root {"))
+        self.assertEqual(expected_text, texts[0])
+        self.assertEqual(expected_text, texts[1])
+
+    def test_all_nodes_filter(self):
+        nukery.script_open(self.file_path)
+        expected = [n.full_name for n in nukery.all_nodes(recursive=True) if n.get_class() == "Grade"]
+        result = [n.full_name for n in nukery.all_nodes("Grade", recursive=True)]
+        group_result = [n.name for n in nukery.all_nodes("Grade", group="root.Group1")]
+        nukery.delete(nukery.to_node("Grade1"))
+        after_delete = [n.full_name for n in nukery.all_nodes("Grade", recursive=True)]
+        nukery.script_clear()
+        cleared = nukery.all_nodes("Grade")
+
+        self.assertEqual(expected, result)
+        self.assertEqual(["Grade1"], group_result)
+        self.assertEqual([n for n in expected if n != "root.Grade1"], after_delete)
+        self.assertEqual([], cleared)
+
+    def test_node_identity(self):
+        nukery.script_open(self.file_path)
+        first = nukery.all_nodes()
+        second = nukery.all_nodes()
+        grade = nukery.create_node("Grade")
+        found = nukery.to_node(grade.name)
+        nukery.script_clear()
+
+        self.assertTrue(all(a is b for a, b in zip(first, second)))
+        self.assertIs(grade, found)
+        self.assertFalse(hasattr(grade, "__dict__"))
+
+    def test_selection(self):
+        nukery.script_open(self.file_path)
+        grade4 = nukery.to_node("Grade4")
+        grade4.set_selected(True)
+        last = nukery.selected_node()
+        nukery.to_node("Grade1")["selected"] = "true"
+        selected = [n.name for n in nukery.selected_nodes()]
+        nukery.delete(nukery.to_node("Grade1"))
+        after_delete = nukery.selected_node().name
+        created = nukery.create_node("Grade")
+        after_create = [n.name for n in nukery.selected_nodes()]
+        nukery.clear_selection()
+        cleared = nukery.selected_nodes()
+        nukery.script_clear()
+
+        self.assertIs(grade4, last)
+        self.assertEqual(["Grade5", "Grade6", "Grade7", "Grade4", "Grade1"], selected)
+        self.assertEqual("Grade4", after_delete)
+        self.assertEqual([created.name], after_create)
+        self.assertEqual([], cleared)
+
+    def test_script_cache(self):
+        nukery.script_open(self.file_path)
+        counts = nukery.SessionStore.get_render_counts()
+        nukery.get_script_text()
+        nukery.SessionStore.reset_render_counts()
+        cached = nukery.get_script_text()
+        cached_counts = dict(counts)
+        nukery.to_node("Grade4")["white"] = "2"
+        nukery.to_node("Grade5").knobs()["white"] = "3"
+        nukery.to_node("root.Group1.Grade1").knobs().pop("selected", None)
+        nukery.to_node("root.Group1.Grade1")["gamma"] = "4"
+        edited = nukery.get_script_text()
+        edited_counts = dict(counts)
+        with nukery.SessionStore("other"):
+            nukery.create_node("Grade")
+            nukery.get_script_text()
+            other_counts = dict(nukery.SessionStore.get_render_counts())
+        nukery.script_clear()
+
+        self.assertEqual({"node": 0, "body": 0}, cached_counts)
+        self.assertEqual({"node": 3, "body": 2}, edited_counts)
+        # renders of other sessions are not counted.
+        self.assertEqual(edited_counts, counts)
+        self.assertEqual({"node": 1, "body": 1}, other_counts)
+        self.assertNotIn("white 2", cached)
+        self.assertIn("white 2", edited)
+        self.assertIn("white 3", edited)
+        self.assertIn("gamma 4", edited)
+
+    def test_batch_edit(self):
+        nukery.script_open(self.file_path)
+        grade4, grade5 = nukery.to_node("Grade4"), nukery.to_node("Grade5")
+        nukery.get_script_text()
+        with nukery.batch_edit():
+            grade4["name"] = "Grade5"
+            grade5["name"] = "Grade4"
+            grade4["white"] = "2"
+            grade4.set_selected(True)
+            in_batch = nukery.get_script_text()
+        swapped = (nukery.to_node("Grade5"), nukery.to_node("Grade4"), nukery.selected_node())
+
+        grades = nukery.all_nodes("Grade")
+        knobs = [list(g.knobs().items()) for g in grades]
+        text = nukery.get_script_text()
+        with self.assertRaises(Exception):
+            nukery.set_knobs(grades, {"name": "Grade", "mix": "0.5"})
+        with self.assertRaises(ValueError):
+            with nukery.batch_edit():
+                grade4["mix"] = "0.5"
+                raise ValueError()
+        rolled_back = [list(g.knobs().items()) for g in grades]
+        rolled_back_text = nukery.get_script_text()
+        name_after_rollback = nukery.to_node("Grade5")
+
+        nukery.set_knobs(grades, {"disable": "true"})
+        disabled = [g["disable"] for g in grades]
+        nukery.script_clear()
+
+        self.assertIn("white 2", in_batch)
+        self.assertEqual((grade4, grade5, grade4), swapped)
+        self.assertEqual(knobs, rolled_back)
+        self.assertEqual(text, rolled_back_text)
+        self.assertIs(grade4, name_after_rollback)
+        self.assertEqual(["true"] * len(grades), disabled)
+
+    def test_bulk_connect(self):
+        top = nukery.create_node("Constant")
+        last = top
+        # diamonds, walking every path downstream of top would take 2**30 steps.
+        for _ in range(30):
+            left = nukery.create_node("Grade")
+            left.set_input(0, last)
+            right = nukery.create_node("Blur")
+            right.set_input(0, last)
+            merge = nukery.create_node("Merge2")
+            merge.set_input(0, left)
+            merge.set_input(1, right)
+            last = merge
+        nukery.clear_selection()
+        source = nukery.create_node("Constant")
+        with self.assertRaises(Exception):
+            top.set_input(0, last)
+        with nukery.bulk_connect():
+            top.set_input(0, source)
+            last.set_input(0, source)
+        connected = (top.input(0), last.input(0), list(source.get_outputs()))
+        bulk = nukery.bulk_connect()
+        with self.assertRaises(Exception):
+            with bulk:
+                left.set_input(0, source)
+                top.set_input(0, last)
+        rolled_back = (top.input(0), left.input(0), list(last.get_outputs()), list(source.get_outputs()))
+        nukery.script_clear()
+
+        self.assertEqual((source.node_store, source.node_store, [top.node_store, last.node_store]), connected)
+        self.assertEqual(1, len(bulk.cycles))
+        self.assertIs(source.node_store, rolled_back[0])
+        self.assertIsNot(source.node_store, rolled_back[1])
+        self.assertEqual([], rolled_back[2])
+        self.assertEqual({id(top.node_store), id(last.node_store)}, set(id(n) for n in rolled_back[3]))
+
+    def test_bulk_connect_delete(self):
+        read = nukery.create_node("Read")
+        grade = nukery.create_node("Grade")
+        blur = nukery.create_node("Blur")
+        with self.assertRaises(Exception):
+            with nukery.bulk_connect():
+                blur.set_input(0, read)
+                nukery.delete(grade)
+        inputs = (grade.input(0), blur.input(0))
+        outputs = list(read.get_outputs())
+        text = nukery.get_script_text()
+        nukery.script_clear()
+
+        self.assertEqual((read.node_store, grade.node_store), inputs)
+        self.assertEqual([grade.node_store], outputs)
+        self.assertIn("Grade", text)
+        self.assertNotIn("push 0", text)
+
+    def test_graph(self):
+        nukery.script_open(self.file_path)
+        group = nukery.to_node("Group1")
+        primatte = nukery.to_node("Primatte1")
+        upstream = [n.full_name for n in group.upstream()]
+        downstream = [n.full_name for n in primatte.downstream()]
+        with group:
+            write = nukery.create_node("Write")
+            write.set_input(0, nukery.to_node("Merge1"))
+        writes = nukery.connected_writes(primatte)
+        cached = primatte.node_store.downstream() is primatte.node_store.downstream()
+        order = nukery.topological_sort(recursive=True)
+        positions = dict((n.full_name, i) for i, n in enumerate(order))
+        nukery.delete(write)
+        writes_after_delete = nukery.connected_writes(primatte)
+        nukery.script_clear()
+
+        self.assertIn("root.Primatte1", upstream)
+        self.assertIn("root.Group1.Input1", upstream)
+        self.assertIn("root.Group1.Grade1", downstream)
+        self.assertIn("root.Group1", downstream)
+        self.assertEqual([write], writes)
+        self.assertTrue(cached)
+        self.assertEqual([], writes_after_delete)
+        for node in order:
+            for input_node in node.node_store.graph_inputs():
+                name = "{0}.{1}".format(input_node.parent, input_node.name)
+                self.assertLess(positions[name], positions[node.full_name])
+
+    def test_fingerprint(self):
+        nukery.script_open(self.file_path)
+        root_fingerprint = nukery.fingerprint()
+        group_fingerprint = nukery.fingerprint("Group1")
+        grade3, grade4, grade7 = nukery.to_node("Grade3"), nukery.to_node("Grade4"), nukery.to_node("Grade7")
+        fingerprints = (grade3.fingerprint(), grade4.fingerprint(), grade7.fingerprint())
+        cached = nukery.fingerprint() == root_fingerprint
+        grade4["black"] = "0.5"
+        changed = (grade3.fingerprint(), grade4.fingerprint(), grade7.fingerprint(), nukery.fingerprint())
+        grade4["black"] = "-0.33"
+        grade4.set_xypos(0, 0)
+        restored = (grade4.fingerprint(), grade7.fingerprint(), nukery.fingerprint())
+        nukery.to_node("root.Group1.Grade1")["gamma"] = "2"
+        group_changed = (nukery.fingerprint("Group1"), nukery.fingerprint())
+        blurs = []
+        for _ in range(2):
+            nukery.clear_selection()
+            blurs.append(nukery.create_node("Blur", size="3"))
+        nukery.clear_selection()
+        other_blur = nukery.create_node("Blur", size="4")
+        nukery.script_clear()
+
+        self.assertTrue(cached)
+        self.assertEqual(fingerprints[0], changed[0])
+        self.assertNotEqual(fingerprints[1], changed[1])
+        self.assertNotEqual(fingerprints[2], changed[2])
+        self.assertNotEqual(root_fingerprint, changed[3])
+        self.assertEqual(fingerprints[1:] + (root_fingerprint,), restored)
+        self.assertNotEqual(group_fingerprint, group_changed[0])
+        self.assertNotEqual(root_fingerprint, group_changed[1])
+        self.assertEqual(blurs[0].fingerprint(), blurs[1].fingerprint())
+        self.assertNotEqual(blurs[0].fingerprint(), other_blur.fingerprint())
+
+    def test_fingerprint_cycle(self):
+        first = nukery.create_node("Grade")
+        second = nukery.create_node("Blur")
+        second.set_input(0, first)
+        with self.assertRaises(Exception):
+            with nukery.bulk_connect():
+                first.set_input(0, second)
+                with self.assertRaises(Exception):
+                    first.fingerprint()
+        fingerprint = first.fingerprint()
+        nukery.clear_selection()
+        constant = nukery.create_node("Constant")
+        with self.assertRaises(Exception):
+            with nukery.bulk_connect():
+                first.set_input(0, constant)
+                changed = second.fingerprint()
+                raise Exception("rollback")
+        rolled_back = second.fingerprint()
+        second.node_store.drop_fingerprint()
+        expected = second.fingerprint()
+        nukery.script_clear()
+
+        self.assertTrue(fingerprint)
+        self.assertNotEqual(changed, rolled_back)
+        self.assertEqual(expected, rolled_back)
+
+    def test_session_context(self):
+        outer = nukery.SessionStore("outer")
+        inner = nukery.SessionStore("inner")
+        with outer:
+            nukery.create_node("Grade")
+            with inner:
+                nukery.create_node("Blur")
+                inner_nodes = [n.name for n in nukery.all_nodes()]
+            outer_nodes = [n.name for n in nukery.all_nodes()]
+            nukery.script_clear()
+            with inner:
+                nukery.script_clear()
+        default_session = nukery.SessionStore.get_current_session()
+
+        self.assertEqual(["Blur1"], inner_nodes)
+        self.assertEqual(["Grade1"], outer_nodes)
+        self.assertEqual("__default__", default_session)
+
+    def test_session_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        nukery.script_open(self.file_path)
+        expected = [n.full_name for n in nukery.all_nodes(recursive=True)]
+        nukery.script_clear()
+
+        def open_script(index):
+            with nukery.SessionStore("thread{0}".format(index)):
+                nukery.script_open(self.file_path)
+                names = [n.full_name for n in nukery.all_nodes(recursive=True)]
+                nukery.script_clear()
+            return names
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(open_script, range(8)))
+
+        self.assertEqual([expected] * 8, results)
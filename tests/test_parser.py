@@ -1,3 +1,4 @@
+import io
 import os
 import unittest
 from collections import OrderedDict
@@ -20,4 +21,91 @@ class TestPaser(unittest.TestCase):
 
         result = list(NukeScriptParser.from_file(self.file_path))
 
-        self.assertEqual(expected_result, result)
\ No newline at end of file
+        self.assertEqual(expected_result, result)
+
+    def test_lexer_engine(self):
+        regex_result = list(NukeScriptParser.from_file(self.file_path))
+        lexer_result = list(NukeScriptParser.from_file(self.file_path, engine=NukeScriptParser.LEXER))
+
+        self.assertEqual(
+            [(n["type"], n["class"], n["var"], n["inputs"]) for n in regex_result],
+            [(n["type"], n["class"], n["var"], n["inputs"]) for n in lexer_result]
+        )
+        # regex engine keeps the space before and the new line after multi line values, and it ends
+        # Viewer1 at the line closing samplepoints, so its knobs are not compared.
+        for regex_node, lexer_node in zip(regex_result[:-1], lexer_result[:-1]):
+            regex_knobs = dict((k, v.strip(" \n")) for k, v in (regex_node["knobs"] or {}).items())
+            self.assertEqual(regex_knobs, lexer_node["knobs"] or {})
+            self.assertEqual(regex_node["user_knobs"] or [], lexer_node["user_knobs"] or [])
+        roto = next(n for n in lexer_result if n["class"] == "Roto")
+        self.assertTrue(roto["knobs"]["curves"].startswith("{{{v x3f99999a}\n"))
+        self.assertTrue(roto["knobs"]["curves"].endswith("}}}}}}"))
+        viewer = lexer_result[-1]
+        self.assertEqual("Viewer1", viewer["knobs"]["name"])
+        self.assertEqual("{{-0.3249999881 0.65625}\n   }", viewer["knobs"]["samplepoints"])
+
+    def test_lexer_multi_line_values(self):
+        text = (
+            'Tracker4 {\n'
+            ' tracks { { 1 31 2 }\n'
+            ' { {curve x1 0 x2 1} "track 1" }\n'
+            ' { {curve x1 0 x2 1} "track 2" }\n'
+            '}\n'
+            ' label "multi\n'
+            'line }"\n'
+            ' addUserKnob {20 User}\n'
+            ' name Tracker1\n'
+            '}\n'
+        )
+        result = list(NukeScriptParser.from_text(text, engine=NukeScriptParser.LEXER))
+
+        self.assertEqual(1, len(result))
+        self.assertEqual(["tracks", "label", "name"], list(result[0]["knobs"].keys()))
+        self.assertEqual('"multi\nline }"', result[0]["knobs"]["label"])
+        self.assertEqual([("User", "20", "{20 User}")], result[0]["user_knobs"])
+
+    def test_from_stream(self):
+        expected_result = list(NukeScriptParser.from_file(self.file_path, engine=NukeScriptParser.LEXER))
+        with open(self.file_path, "r") as f:
+            text = f.read()
+
+        for chunk_size in (1, 100, 1 << 20):
+            result = list(NukeScriptParser.from_stream(io.StringIO(text), chunk_size=chunk_size))
+            self.assertEqual(expected_result, result)
+        result = list(NukeScriptParser.from_stream(io.BytesIO(text.encode("utf-8")), chunk_size=100))
+        self.assertEqual(expected_result, result)
+        self.assertEqual(expected_result, list(NukeScriptParser.iter_file(self.file_path)))
+
+    def test_lazy_groups(self):
+        text = (
+            'Group {\n'
+            ' name Outer\n'
+            '}\n'
+            ' Group {\n'
+            '  name Inner\n'
+            '  label "end_group\n'
+            'Group {"\n'
+            ' }\n'
+            '  Blur {\n'
+            '   name Blur1\n'
+            '  }\n'
+            'set N1a [stack 0]\n'
+            ' end_group\n'
+            'end_group\n'
+            'LiveGroup {\n'
+            ' published true\n'
+            ' name LiveGroup1\n'
+            '}\n'
+            'Dot {\n'
+            ' name Dot1\n'
+            '}\n'
+        )
+        result = list(NukeScriptParser.from_text(text, lazy_groups=True))
+        streamed = list(NukeScriptParser.from_stream(io.StringIO(text), chunk_size=8, lazy_groups=True))
+
+        self.assertEqual(["Outer", "LiveGroup1", "Dot1"], [n["knobs"]["name"] for n in result])
+        self.assertTrue(result[0]["group_content"].startswith(" Group {\n  name Inner\n"))
+        self.assertTrue(result[0]["group_content"].endswith("set N1a [stack 0]\n end_group"))
+        self.assertEqual(["N1a"], result[0]["group_variables"])
+        self.assertNotIn("group_content", result[1])
+        self.assertEqual(result, streamed)